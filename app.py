@@ -2,13 +2,21 @@
 # IMPORT LIBRARIES
 # =========================
 
+from functools import partial
+
 import streamlit as st          # Streamlit is used to build the web dashboard UI
-import zipfile                  # .pbit file is actually a ZIP file, so we extract it
-import json                     # Used to read Power BI internal JSON files
-import os                       # Used for file/folder operations
-import shutil                   # Used to delete old extracted folders safely
-import re                       # Used to parse DAX expressions (dependency detection)
-import pandas as pd             # Used to create Excel report
+
+from config.settings import EXPORT_FILE_NAME, PROFILE_TRACE_MEMORY
+from core.constants import SCHEMA_FILE_NAME
+from core.file_manager import read_archive_members   # .pbit file is a ZIP, read members in memory
+from core.profiling import StageProfiler             # Per-stage wall/CPU time and memory peaks
+from services.cache_service import analysis_key, load_cached_analysis, store_analysis, load_snapshot, store_snapshot
+from services.cache_service import dataset_name, store_schema, load_cached_schema, list_cached_schemas
+from services.extraction_service import is_pbix, read_report_layout, read_model_schema, pbix_members
+from services.export_service import generate_excel   # Used to create Excel report
+from services.incremental_service import analyze_incremental   # Steps 2-9, reusing the last version's work
+from services.usage_index_service import index_report   # Cross-report lookups (Usage Index page)
+from ui.components import run_in_background, show_field_list, show_impact, show_lineage   # Shared with pages/
 
 
 # =========================
@@ -21,98 +29,43 @@ st.set_page_config(page_title="Power BI Model Analyzer", layout="wide")
 st.title("📊 Power BI Model Analyzer")
 # Displays main title on dashboard
 
-st.write("Upload a PBIT file to analyze field usage, dependencies, relationships, unused objects, and export report.")
+st.write("Upload a PBIT (or PBIX) file to analyze field usage, dependencies, relationships, unused objects, and export report.")
 # Short description explaining what this tool does
 
-uploaded_file = st.file_uploader("Upload PBIT File", type=["pbit"])
-# Allows user to upload Power BI Template (.pbit) file
+uploaded_file = st.file_uploader("Upload PBIT or PBIX File", type=["pbit", "pbix"])
+# Allows user to upload Power BI Template (.pbit) file, or a report (.pbix)
+# whose usage is checked against a model schema (see PBIX MODEL below)
 # Entire analysis pipeline starts only after this upload
 
 
 # =========================
-# JSON LOADER FUNCTION
-# =========================
-
-def load_json_file(path):
-    """
-    Power BI stores internal JSON in UTF-16 or UTF-8.
-    This function safely tries multiple encodings.
-    If this fails, entire dependency detection fails.
-    """
-    with open(path, "rb") as f:
-        raw = f.read()
-
-    for enc in ["utf-16-le", "utf-16-be", "utf-8"]:
-        try:
-            return json.loads(raw.decode(enc))
-        except:
-            continue
-
-    raise Exception(f"Could not decode {path}")
-
-
-# =========================
-# DETECT SYSTEM DATE TABLES
-# =========================
-
-def is_system_date_table(table):
-    """
-    Power BI auto-creates hidden LocalDateTable_xxxxx tables.
-    We exclude them to avoid incorrect unused detection.
-    """
-    for ann in table.get("annotations", []):
-        if ann.get("name") in ["__PBI_TemplateDateTable", "__PBI_LocalDateTable"] and ann.get("value") == "true":
-            return True
-    return False
-
-
-# =========================
-# RECURSIVE FIELD EXTRACTOR (DIRECT USAGE)
+# PBIX MODEL
 # =========================
 
-def extract_fields(obj, alias_map=None):
+def choose_pbix_schema(uploaded_file):
     """
-    Recursively scans Layout JSON to find:
-    - Columns used in visuals
-    - Measures used in visuals
-    These become DIRECT usage starting points.
+    A .pbix carries the data itself (DataModel) but no DataModelSchema,
+    so the model comes from an uploaded .pbit / model JSON or from the
+    schema kept when a .pbit was analyzed here. Returns (schema_id,
+    loader) or None when no model is available yet.
     """
+    model_file = st.file_uploader(
+        "Model for this PBIX (PBIT, DataModelSchema or model.bim JSON)",
+        type=["pbit", "json", "bim"]
+    )
+    if model_file:
+        return model_file.file_id, lambda: read_model_schema(model_file)
 
-    if isinstance(obj, dict):
-
-        # -------- COLUMN DETECTION --------
-        if "Column" in obj:
-            col = obj["Column"]
-
-            prop = col.get("Property")  # Column name
-            source = col.get("Expression", {}).get("SourceRef", {}).get("Source")
-            entity = col.get("Expression", {}).get("SourceRef", {}).get("Entity")
-
-            table = alias_map.get(source) if alias_map and source else entity
+    cached = list_cached_schemas()
+    if not cached:
+        st.info("Upload the model above, or analyze the matching PBIT first.")
+        return None
 
-            if table and prop:
-                used_fields.add(f"{table.strip()}[{prop.strip()}]")
-
-        # -------- MEASURE DETECTION --------
-        if "Measure" in obj:
-            msr = obj["Measure"]
-
-            prop = msr.get("Property")  # Measure name
-            source = msr.get("Expression", {}).get("SourceRef", {}).get("Source")
-            entity = msr.get("Expression", {}).get("SourceRef", {}).get("Entity")
-
-            table = alias_map.get(source) if alias_map and source else entity
-
-            if table and prop:
-                used_fields.add(f"{table.strip()}[{prop.strip()}]")
-
-        # Continue recursion
-        for v in obj.values():
-            extract_fields(v, alias_map)
-
-    elif isinstance(obj, list):
-        for item in obj:
-            extract_fields(item, alias_map)
+    # Same file name as the report is the likely match
+    dataset = dataset_name(uploaded_file.name)
+    index = cached.index(dataset) if dataset in cached else 0
+    choice = st.selectbox("Or pair with the model of an analyzed PBIT", cached, index=index)
+    return "cache:" + choice, lambda: load_cached_schema(choice)
 
 
 # =========================
@@ -121,207 +74,106 @@ def extract_fields(obj, alias_map=None):
 
 if uploaded_file:
 
-    # =========================
-    # STEP 1: EXTRACT PBIT
-    # =========================
-
-    base_path = os.path.join(os.getcwd(), "extracted_pbit")
-
-    if os.path.exists(base_path):
-        shutil.rmtree(base_path)  # Delete previous extraction
-
-    os.makedirs(base_path, exist_ok=True)
-
-    pbit_path = os.path.join(base_path, uploaded_file.name)
-
-    with open(pbit_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    # Extract ZIP
-    with zipfile.ZipFile(pbit_path, 'r') as zip_ref:
-        zip_ref.extractall(base_path)
-
-    st.success("✅ PBIT Extracted")
-
-    # =========================
-    # STEP 2: LOAD MODEL METADATA
-    # =========================
-
-    schema_json = load_json_file(os.path.join(base_path, "DataModelSchema"))
-    model = schema_json.get("model", {})
-    tables = model.get("tables", [])
-    relationships = model.get("relationships", [])
-
-    # Initialize storage sets
-    all_columns = set()
-    all_measures = set()
-    used_fields = set()
-    measure_dependencies_raw = {}
-    all_tables = set()
-
-    # =========================
-    # STEP 3: RELATIONSHIP COLUMNS
-    # =========================
-
-    relationship_columns = set()
-
-    for rel in relationships:
-
-        from_table = rel.get("fromTable")
-        from_column = rel.get("fromColumn")
-        to_table = rel.get("toTable")
-        to_column = rel.get("toColumn")
-
-        # Skip LocalDateTable relationships
-        if from_table and from_table.startswith("LocalDateTable_"):
-            continue
-        if to_table and to_table.startswith("LocalDateTable_"):
-            continue
-
-        if from_table and from_column:
-            relationship_columns.add(f"{from_table}[{from_column}]")
-
-        if to_table and to_column:
-            relationship_columns.add(f"{to_table}[{to_column}]")
-
-    # These columns are auto-considered used because they affect filtering
-
-
-    # =========================
-    # STEP 4: COLLECT MODEL OBJECTS
-    # =========================
-
-    for table in tables:
-
-        if is_system_date_table(table):
-            continue
-
-        table_name = table.get("name")
-        all_tables.add(table_name)
-
-        # Collect columns
-        for col in table.get("columns", []):
-            col_name = f"{table_name}[{col.get('name')}]"
-            all_columns.add(col_name)
-
-            # If calculated column, store expression for dependency graph
-            if col.get("expression"):
-                measure_dependencies_raw[col_name] = col.get("expression")
-
-        # Collect measures
-        for msr in table.get("measures", []):
-            measure_name = f"{table_name}[{msr.get('name')}]"
-            all_measures.add(measure_name)
-
-            if msr.get("expression"):
-                measure_dependencies_raw[measure_name] = msr.get("expression")
-
-
-    # =========================
-    # STEP 5: EXTRACT DIRECT USAGE FROM LAYOUT
-    # =========================
-
-    layout_json = load_json_file(os.path.join(base_path, "Report", "Layout"))
-
-    for section in layout_json.get("sections", []):
-        for visual in section.get("visualContainers", []):
-
-            if visual.get("query"):
-                try:
-                    q_json = json.loads(visual["query"])
-                    for cmd in q_json.get("Commands", []):
-                        sqd = cmd.get("SemanticQueryDataShapeCommand", {})
-                        query_part = sqd.get("Query", {})
-                        alias_map = {f.get("Name"): f.get("Entity") for f in query_part.get("From", [])}
-                        extract_fields(query_part, alias_map)
-                except:
-                    pass
-
-
-    # =========================
-    # STEP 6: DIRECT USAGE
-    # =========================
-
-    direct_columns = used_fields.intersection(all_columns)
-    direct_measures = used_fields.intersection(all_measures)
-
-
-    # =========================
-    # STEP 7: BUILD DEPENDENCY GRAPH
-    # =========================
-
-    dependency_graph = {}
-
-    normalized_columns = {c.lower().strip(): c for c in all_columns}
-    normalized_measures = {m.lower().strip(): m for m in all_measures}
-
-    for obj_name, expr in measure_dependencies_raw.items():
-
-        deps = set()
-
-        if isinstance(expr, list):
-            expr = " ".join(expr)
-
-        if not isinstance(expr, str):
-            dependency_graph[obj_name] = deps
-            continue
-
-        expr = expr.replace("\n", " ")
-        expr = re.sub(r"\s+", " ", expr)
-
-        # Extract table[column]
-        pattern_col = r"([A-Za-z0-9_ ]+)\s*\[\s*([^\]]+)\s*\]"
-        for table, col in re.findall(pattern_col, expr):
-            candidate = f"{table.strip()}[{col.strip()}]"
-            if candidate.lower() in normalized_columns:
-                deps.add(normalized_columns[candidate.lower()])
-
-        # Extract measure references
-        pattern_msr = r"(?<![A-Za-z0-9_ ])\[\s*([^\]]+?)\s*\]"
-        for m in re.findall(pattern_msr, expr):
-            for msr_norm, msr_original in normalized_measures.items():
-                if msr_norm.endswith(f"[{m.strip().lower()}]"):
-                    deps.add(msr_original)
-
-        dependency_graph[obj_name] = deps
-
-
-    # =========================
-    # STEP 8: RECURSIVE PROPAGATION
-    # =========================
+    pbix = is_pbix(uploaded_file.name)
+    schema_id = ""
+
+    if pbix:
+        pairing = choose_pbix_schema(uploaded_file)
+        if pairing is None:
+            st.stop()
+        schema_id, load_schema = pairing
+
+    # Set by the checkbox next to the Performance panel
+    trace_memory = st.session_state.get("trace_memory", PROFILE_TRACE_MEMORY)
+
+    # Streamlit reruns this script on every widget interaction; the
+    # result is kept per upload (and model, and tracing) so reruns skip
+    # straight to the display
+    upload_id = f"{uploaded_file.file_id}:{schema_id}:{trace_memory}"
+    memo = st.session_state.get("analysis")
+
+    # Analysis key of the last version of each file name uploaded in
+    # this session: the next version is compared with that one only
+    last_versions = st.session_state.setdefault("last_versions", {})
+
+    if memo and memo["upload_id"] == upload_id:
+        result = memo["result"]
+        profile = memo["profile"]
+        changes = memo["changes"]
+
+    else:
+        profiler = StageProfiler(trace_memory)
+
+        # =========================
+        # STEP 1: READ PBIT
+        # =========================
+
+        # Only DataModelSchema and Report/Layout are read from the upload buffer;
+        # nothing is written to disk and large blobs (DataMashup, DataModel) are skipped
+        with profiler.stage("read_archive"):
+            if pbix:
+                members = pbix_members(read_report_layout(uploaded_file), load_schema())
+            else:
+                members = read_archive_members(uploaded_file)
+
+        st.success("✅ PBIX Layout Loaded" if pbix else "✅ PBIT Loaded")
+
+        # Identical templates (same schema + layout bytes) reuse the stored result
+        with profiler.stage("cache_lookup"):
+            cache_key = analysis_key(members)
+            # A traced run analyzes again, so every stage gets its peak
+            result = None if trace_memory else load_cached_analysis(cache_key)
+
+        if not pbix:
+            # Kept so .pbix reports of the same model can be analyzed
+            # later; a cached result's schema is normally kept already,
+            # and storing it again then costs no compression or eviction
+            with profiler.stage("schema_store"):
+                store_schema(dataset_name(uploaded_file.name), members[SCHEMA_FILE_NAME])
+
+        changes = None
+
+        if result is None:
+            # A new version of a report analyzed before only re-tokenizes
+            # the DAX and re-parses the visuals that changed
+            with profiler.stage("snapshot_lookup"):
+                last_key = last_versions.get(uploaded_file.name)
+                snapshot = load_snapshot(last_key) if last_key else None
+
+            # Already one run per pool worker: no nested layout parse
+            # pool, only the layout branch beside the model branch
+            analyze = partial(analyze_incremental, parallel=False, overlap=True)
+            result, snapshot, changes = run_in_background(analyze, members, snapshot, StageProfiler(trace_memory))
+            profiler.merge(result.profile)
+
+            with profiler.stage("cache_store"):
+                store_analysis(cache_key, result)
+                store_snapshot(cache_key, snapshot)
+        else:
+            st.success("⚡ Loaded cached analysis")
 
-    all_used_measures = set(direct_measures)
-    all_used_columns = set(direct_columns).union(relationship_columns)
+        # Cached or not, this version is the one the next upload of the
+        # file name is compared with (its snapshot is stored under cache_key)
+        last_versions[uploaded_file.name] = cache_key
 
-    changed = True
+        # Skipped when this file's index entry already holds this analysis
+        with profiler.stage("index_store"):
+            index_report(uploaded_file.name, result, cache_key)
 
-    while changed:
-        changed = False
+        profile = profiler.to_dict()
+        st.session_state["analysis"] = {"upload_id": upload_id, "result": result, "profile": profile, "changes": changes}
 
-        for measure in list(all_used_measures):
-            for dep in dependency_graph.get(measure, []):
+    summary = result.compute_summary()
 
-                if dep in all_measures and dep not in all_used_measures:
-                    all_used_measures.add(dep)
-                    changed = True
+    if result.dependency_cycles:
+        st.warning("⚠️ Circular DAX dependencies: " + "; ".join(" → ".join(c) for c in result.dependency_cycles))
 
-                if dep in all_columns and dep not in all_used_columns:
-                    all_used_columns.add(dep)
-                    changed = True
-
-
-    # =========================
-    # STEP 9: FINAL CATEGORIZATION
-    # =========================
-
-    indirect_measures = all_used_measures - direct_measures
-    indirect_columns = all_used_columns - direct_columns - relationship_columns
-    relationship_only_columns = relationship_columns - direct_columns
-    unused_columns = all_columns - all_used_columns
-    unused_measures = all_measures - all_used_measures
-
-    used_tables = set(f.split("[")[0] for f in all_used_columns.union(all_used_measures))
-    unused_tables = all_tables - used_tables
+    # None on the first upload of this file name (nothing to compare with)
+    if changes:
+        with st.expander(f"🔁 Changed since the last upload ({len(changes)})"):
+            st.dataframe(changes, hide_index=True, width="stretch")
+    elif changes is not None:
+        st.info("🔁 No measure, column, page or visual changed since the last upload.")
 
 
     # =========================
@@ -331,77 +183,72 @@ if uploaded_file:
     st.markdown("## 📊 Model Summary")
 
     c1, c2, c3 = st.columns(3)
-    c1.metric("Tables", len(all_tables))
-    c2.metric("Used Tables", len(all_tables) - len(unused_tables))
-    c3.metric("Unused Tables", len(unused_tables))
+    c1.metric("Tables", summary["Total Tables"])
+    c2.metric("Used Tables", summary["Used Tables"])
+    c3.metric("Unused Tables", summary["Unused Tables"])
 
     c4, c5, c6 = st.columns(3)
-    c4.metric("Columns", len(all_columns))
-    c5.metric("Unused Columns", len(unused_columns))
-    c6.metric("Relationships", len(relationships))
+    c4.metric("Columns", summary["Total Columns"])
+    c5.metric("Unused Columns", summary["Unused Columns"])
+    c6.metric("Relationships", summary["Relationships"])
 
     c7, c8 = st.columns(2)
-    c7.metric("Measures", len(all_measures))
-    c8.metric("Unused Measures", len(unused_measures))
+    c7.metric("Measures", summary["Total Measures"])
+    c8.metric("Unused Measures", summary["Unused Measures"])
 
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("📌 Used Fields")
-        st.write("### 🟢 Direct Columns")
-        st.write(sorted(direct_columns))
-        st.write("### 🔗 Relationship Columns")
-        st.write(sorted(relationship_only_columns))
-        st.write("### 🟡 Indirect Columns")
-        st.write(sorted(indirect_columns))
-        st.write("### 🔵 Direct Measures")
-        st.write(sorted(direct_measures))
-        st.write("### 🟣 Indirect Measures")
-        st.write(sorted(indirect_measures))
+        show_field_list("🟢 Direct Columns", result.direct_columns, "direct_columns")
+        show_field_list("🔗 Relationship Columns", result.relationship_only_columns, "relationship_columns")
+        show_field_list("🟡 Indirect Columns", result.indirect_columns, "indirect_columns")
+        show_field_list("🔵 Direct Measures", result.direct_measures, "direct_measures")
+        show_field_list("🟣 Indirect Measures", result.indirect_measures, "indirect_measures")
 
     with col2:
         st.subheader("🚫 Unused Fields")
-        st.write("### 🔴 Unused Columns")
-        st.write(sorted(unused_columns))
-        st.write("### 🟠 Unused Measures")
-        st.write(sorted(unused_measures))
+        show_field_list("🔴 Unused Columns", result.unused_columns, "unused_columns")
+        show_field_list("🟠 Unused Measures", result.unused_measures, "unused_measures")
 
 
     # =========================
-    # EXCEL EXPORT
+    # IMPACT ANALYSIS
     # =========================
 
-    export_rows = []
+    st.markdown("## 🧨 Impact of Removing")
+    show_impact(result, st.session_state["analysis"])
 
-    for col in all_columns:
 
-        if col in direct_columns:
-            status = "Directly Used"
-        elif col in relationship_columns:
-            status = "Used in Relationship"
-        elif col in indirect_columns:
-            status = "Indirectly Used"
-        else:
-            status = "Unused"
+    # =========================
+    # LINEAGE EXPLORER
+    # =========================
 
-        export_rows.append({"Field": col, "Type": "Column", "Status": status})
+    st.markdown("## 🧬 Lineage")
+    show_lineage(result, st.session_state["analysis"])
 
-    for msr in all_measures:
 
-        if msr in direct_measures:
-            status = "Directly Used"
-        elif msr in indirect_measures:
-            status = "Indirectly Used"
-        else:
-            status = "Unused"
+    # =========================
+    # PERFORMANCE
+    # =========================
+
+    st.checkbox(
+        "Trace memory per stage", value=PROFILE_TRACE_MEMORY, key="trace_memory",
+        help="Analyzes again with tracemalloc (several times slower) and adds each stage's peak below."
+    )
 
-        export_rows.append({"Field": msr, "Type": "Measure", "Status": status})
+    with st.expander("⏱️ Performance"):
+        st.write(f"Total: {profile['total_wall_s']:.3f}s")
+        if "peak_bytes" in profile:
+            st.write(f"Peak traced memory: {profile['peak_bytes'] / 1e6:.1f} MB")
+        st.dataframe(profile["stages"], hide_index=True, width="stretch")
+        st.json(profile["counters"])
 
-    df = pd.DataFrame(export_rows)
 
-    excel_file = os.path.join(base_path, "PowerBI_Model_Analysis.xlsx")
-    df.to_excel(excel_file, index=False)
+    # =========================
+    # EXCEL EXPORT
+    # =========================
 
-    with open(excel_file, "rb") as f:
-        st.download_button("📥 Download Excel Report", f, file_name="PowerBI_Model_Analysis.xlsx")
+    # Built only when the button is clicked (callable data), not on every rerun
+    st.download_button("📥 Download Excel Report", lambda: generate_excel(result), file_name=EXPORT_FILE_NAME)
@@ -0,0 +1,96 @@
+"""
+Times the re-analysis of a slightly edited template against a full
+analysis, and checks both give the same result.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_incremental [--tier large] [--repeat 3]
+
+Version 2 of each synthetic model changes one measure expression and
+swaps the config of one visual; analyze_incremental() gets the
+snapshot of version 1 and must only tokenize / parse what changed.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+from core.profiling import StageProfiler
+from services.analysis_service import analyze_members
+from services.incremental_service import analyze_incremental
+from benchmarks.bench_pipeline import TIERS
+from benchmarks.pbit_generator import build_schema, build_layout
+
+
+def build_versions(tier, encoding):
+    rng = random.Random(0)
+    schema = build_schema(rng=rng, **{k: v for k, v in TIERS[tier].items() if k not in ("visuals", "pages")})
+    layout = build_layout(schema, TIERS[tier]["visuals"], TIERS[tier]["pages"], rng)
+
+    v1 = _members(schema, layout, encoding)
+
+    # One measure now references another column, one visual shows other fields
+    measure = schema["model"]["tables"][0]["measures"][0]
+    column = schema["model"]["tables"][-1]["columns"][-1]["name"]
+    measure["expression"] = f"SUM('{schema['model']['tables'][-1]['name']}'[{column}])"
+
+    sections = layout["sections"]
+    visuals = sections[0]["visualContainers"]
+    visuals[0]["config"] = sections[-1]["visualContainers"][-1]["config"]
+
+    return v1, _members(schema, layout, encoding)
+
+
+def _members(schema, layout, encoding):
+    return {
+        SCHEMA_FILE_NAME: json.dumps(schema, indent=2).encode(encoding),
+        LAYOUT_FILE_PATH: json.dumps(layout).encode(encoding)
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return time.perf_counter() - start, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental re-analysis.")
+    parser.add_argument("--tiers", nargs="+", default=["medium", "large"], choices=list(TIERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--encoding", default="utf-16-le", choices=["utf-16-le", "utf-8"])
+    args = parser.parse_args()
+
+    for tier in args.tiers:
+        v1, v2 = build_versions(tier, args.encoding)
+        _, snapshot, _ = analyze_incremental(v1, parallel=False)
+
+        full_times = []
+        incremental_times = []
+
+        for _ in range(args.repeat):
+            seconds, full = timed(analyze_members, v2, StageProfiler(trace_memory=False), parallel=False)
+            full_times.append(seconds)
+
+            seconds, (result, _, changes) = timed(
+                analyze_incremental, v2, snapshot, StageProfiler(trace_memory=False), parallel=False
+            )
+            incremental_times.append(seconds)
+
+        if result.to_dict() != full.to_dict():
+            raise SystemExit(f"{tier}: incremental result differs from the full analysis")
+
+        full_s = statistics.median(full_times)
+        incremental_s = statistics.median(incremental_times)
+        counters = result.profile["counters"]
+
+        print(f"{tier}: full {full_s:.4f}s, incremental {incremental_s:.4f}s (x{full_s / incremental_s:.1f})")
+        listed = ", ".join(f"{c['Type']} {c['Object']} ({c['Change']})" for c in changes)
+        print(f"  changed objects: {listed}")
+        print(f"  tokenized expressions: {counters['tokenized_expressions']}, parsed strings: {counters['parsed_texts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares the old try-every-encoding JSON loader with core.json_loader.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_json_loader [path/to/file.pbit] [--encoding utf-8]
+
+--encoding re-encodes each member first, e.g. utf-8 shows the worst case
+of the old loader (two failed full decodes and parses before success).
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+from core.file_manager import read_archive_members
+from core.json_loader import loads_json, decode_stats, reset_decode_stats
+
+
+def legacy_loads_json(raw, counter):
+    for enc in ["utf-16-le", "utf-16-be", "utf-8"]:
+        counter["decodes"] += 1
+        try:
+            return json.loads(raw.decode(enc))
+        except:
+            continue
+
+    raise Exception("Unable to decode")
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", nargs="?", default="Files/demo_pbit.pbit")
+    parser.add_argument("--encoding", help="re-encode members before loading")
+    args = parser.parse_args()
+
+    members = read_archive_members(args.path)
+
+    for name in (SCHEMA_FILE_NAME, LAYOUT_FILE_PATH):
+        raw = members[name]
+        if args.encoding:
+            raw = json.dumps(loads_json(raw)).encode(args.encoding)
+
+        counter = {"decodes": 0}
+        old_time, old_peak = measure(lambda: legacy_loads_json(raw, counter))
+
+        reset_decode_stats()
+        new_time, new_peak = measure(lambda: loads_json(raw, name))
+
+        print(f"{name} ({len(raw):,} bytes)")
+        print(f"  legacy : {counter['decodes']} decodes, {old_time * 1000:8.2f} ms, peak {old_peak / 1e6:8.2f} MB")
+        print(f"  sniffed: {decode_stats()['decodes']} decodes, {new_time * 1000:8.2f} ms, peak {new_peak / 1e6:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares the old recursive Layout field extractor with the single-pass
+explicit-stack walker in services.layout_service.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_layout_walker [path/to/file.pbit] [--copies 200] [--depth 5000]
+
+--copies repeats every visual container to simulate a large report,
+--depth builds one deeply nested config to check the recursion limit.
+"""
+
+import argparse
+import json
+import time
+
+from core.constants import LAYOUT_FILE_PATH
+from core.file_manager import read_archive_members
+from core.json_loader import loads_json
+from services.layout_service import extract_fields
+
+
+def legacy_extract_fields(obj, used_fields, alias_map=None):
+
+    if isinstance(obj, dict):
+
+        for key in ("Column", "Measure"):
+            if key in obj:
+                ref = obj[key]
+                prop = ref.get("Property")
+                source = ref.get("Expression", {}).get("SourceRef", {}).get("Source")
+                entity = ref.get("Expression", {}).get("SourceRef", {}).get("Entity")
+
+                table = alias_map.get(source) if alias_map and source else entity
+
+                if table and prop:
+                    used_fields.add(f"{table}[{prop}]")
+
+        if "Aggregation" in obj:
+            legacy_extract_fields(obj["Aggregation"], used_fields, alias_map)
+
+        for v in obj.values():
+            legacy_extract_fields(v, used_fields, alias_map)
+
+    elif isinstance(obj, list):
+        for item in obj:
+            legacy_extract_fields(item, used_fields, alias_map)
+
+
+def legacy_scan(configs):
+    used_fields = set()
+    for cfg_json in configs:
+        proto = cfg_json.get("singleVisual", {}).get("prototypeQuery", {})
+        alias_map = {f.get("Name"): f.get("Entity") for f in proto.get("From", [])}
+        legacy_extract_fields(proto, used_fields, alias_map)
+        legacy_extract_fields(cfg_json, used_fields, alias_map)
+    return used_fields
+
+
+def walker_scan(configs):
+    used_fields = set()
+    for cfg_json in configs:
+        proto = cfg_json.get("singleVisual", {}).get("prototypeQuery", {})
+        alias_map = {f.get("Name"): f.get("Entity") for f in proto.get("From", [])}
+        extract_fields(cfg_json, used_fields, alias_map)
+    return used_fields
+
+
+def deep_config(depth):
+    node = {"Column": {"Expression": {"SourceRef": {"Entity": "Deep"}}, "Property": "Leaf"}}
+    for _ in range(depth):
+        node = {"Aggregation": {"Expression": node}}
+    return {"singleVisual": {"prototypeQuery": {"Select": [node]}}}
+
+
+def timed(func, configs):
+    start = time.perf_counter()
+    try:
+        fields = func(configs)
+    except RecursionError:
+        return None, time.perf_counter() - start
+    return fields, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", nargs="?", default="Files/demo_pbit.pbit")
+    parser.add_argument("--copies", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=5000)
+    args = parser.parse_args()
+
+    layout = loads_json(read_archive_members(args.path, [LAYOUT_FILE_PATH])[LAYOUT_FILE_PATH])
+    configs = [
+        json.loads(visual["config"])
+        for section in layout.get("sections", [])
+        for visual in section.get("visualContainers", [])
+        if visual.get("config")
+    ] * args.copies
+
+    old_fields, old_time = timed(legacy_scan, configs)
+    new_fields, new_time = timed(walker_scan, configs)
+
+    print(f"{len(configs):,} visual configs")
+    print(f"  recursive: {old_time * 1000:8.2f} ms, {len(old_fields)} fields")
+    print(f"  walker   : {new_time * 1000:8.2f} ms, {len(new_fields)} fields")
+    print(f"  same fields: {old_fields == new_fields}")
+
+    deep = [deep_config(args.depth)]
+    old_fields, old_time = timed(legacy_scan, deep)
+    new_fields, new_time = timed(walker_scan, deep)
+
+    print(f"nesting depth {args.depth:,}")
+    print(f"  recursive: {'RecursionError' if old_fields is None else sorted(old_fields)}")
+    print(f"  walker   : {sorted(new_fields)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Times lineage neighborhood queries on synthetic models and checks them
+against the full dependency closures.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_lineage [--tiers medium large] [--hops 2] [--queries 200]
+
+For random columns and measures of each tier, the downstream and
+upstream neighborhoods are built (cold, then from the cache) and
+rendered to DOT. With an unlimited budget and enough hops, the fields
+of a neighborhood must equal DependencyGraph.reverse_closure() /
+closure() of the field.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+from core.profiling import StageProfiler
+from services.analysis_service import analyze_members
+from services.dependency_graph import DependencyGraph
+from services.lineage_service import LineageGraph, UPSTREAM, DOWNSTREAM, VISUAL, to_dot
+from benchmarks.bench_pipeline import TIERS
+from benchmarks.pbit_generator import build_schema, build_layout
+
+
+def analyze_tier(tier):
+    rng = random.Random(0)
+    schema = build_schema(rng=rng, **{k: v for k, v in TIERS[tier].items() if k not in ("visuals", "pages")})
+    layout = build_layout(schema, TIERS[tier]["visuals"], TIERS[tier]["pages"], rng)
+
+    members = {
+        SCHEMA_FILE_NAME: json.dumps(schema).encode("utf-16-le"),
+        LAYOUT_FILE_PATH: json.dumps(layout).encode("utf-16-le")
+    }
+    return analyze_members(members, StageProfiler(trace_memory=False), parallel=False)
+
+
+def check_closures(result, lineage_graph, fields):
+    graph = DependencyGraph()
+    for source, target in result.dependency_edges:
+        graph.add_edge(result.fields.names[source], result.fields.names[target])
+
+    unlimited = len(result.fields) + len(result.visuals) + 1
+
+    for field in fields:
+        for direction, expected in (
+            (DOWNSTREAM, graph.reverse_closure([field])),
+            (UPSTREAM, graph.closure([field]))
+        ):
+            lineage = lineage_graph.neighborhood(field, direction, unlimited, unlimited)
+            found = {label for _, label, kind, _ in lineage.nodes if kind != VISUAL}
+            if found != expected or lineage.omitted:
+                raise SystemExit(f"{field} {direction}: neighborhood differs from the dependency closure")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lineage neighborhood queries.")
+    parser.add_argument("--tiers", nargs="+", default=["medium", "large"], choices=list(TIERS))
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    for tier in args.tiers:
+        result = analyze_tier(tier)
+
+        start = time.perf_counter()
+        lineage_graph = LineageGraph(result)
+        build_s = time.perf_counter() - start
+
+        fields = random.Random(1).sample(result.fields.names, min(args.queries, len(result.fields)))
+        check_closures(result, LineageGraph(result), fields[:20])
+
+        cold = []
+        cached = []
+        nodes = []
+        for field in fields:
+            for direction in (DOWNSTREAM, UPSTREAM):
+                start = time.perf_counter()
+                lineage = lineage_graph.neighborhood(field, direction, args.hops)
+                to_dot(lineage)
+                cold.append(time.perf_counter() - start)
+                nodes.append(len(lineage.nodes))
+
+                start = time.perf_counter()
+                to_dot(lineage_graph.neighborhood(field, direction, args.hops))
+                cached.append(time.perf_counter() - start)
+
+        print(
+            f"{tier}: {len(result.fields)} fields, {len(result.dependency_edges)} edges, "
+            f"{len(result.visuals)} visuals; graph built in {build_s * 1000:.1f} ms"
+        )
+        print(
+            f"  {len(cold)} queries ({args.hops} hops): median {statistics.median(nodes)} nodes, max {max(nodes)}; "
+            f"cold median {statistics.median(cold) * 1000:.2f} ms, max {max(cold) * 1000:.2f} ms; "
+            f"cached median {statistics.median(cached) * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
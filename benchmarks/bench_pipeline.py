@@ -0,0 +1,156 @@
+"""
+Times every pipeline stage on synthetic models of increasing size and
+compares the results with a stored baseline.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline [--tiers small medium] [--repeat 3]
+    python -m benchmarks.bench_pipeline --update-baseline
+    python -m benchmarks.bench_pipeline --stream   (streaming Layout parser)
+
+Each tier is generated with benchmarks.pbit_generator into a temporary
+folder. Stage timings come from the same StageProfiler the app uses
+(read_archive, load_schema, collect_metadata, load_layout, scan_layout,
+build_graph, propagate) plus the Excel export. From
+LAYOUT_OVERLAP_MIN_BYTES up, the layout stages run in a process of
+their own while the schema stages run, so the total is compared as
+well. The median over the
+repeats is kept, after one discarded warm-up run. A stage regresses
+when it is more than --tolerance slower than the baseline and the
+difference is above --min-delta seconds; the exit code is 1 if any
+stage regressed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+
+from core.file_manager import read_archive_members
+from core.profiling import StageProfiler
+from services.analysis_service import analyze_members
+from services.export_service import generate_excel
+from benchmarks.pbit_generator import generate_pbit
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+TIERS = {
+    "small": dict(tables=10, columns=20, measures=50, chain_depth=3, fan_out=2, visuals=20, pages=2),
+    "medium": dict(tables=50, columns=40, measures=1000, chain_depth=8, fan_out=3, visuals=500, pages=20),
+    "large": dict(tables=200, columns=60, measures=5000, chain_depth=20, fan_out=4, visuals=3000, pages=100)
+}
+
+
+def run_once(path, stream=None):
+    profiler = StageProfiler(trace_memory=False)
+
+    with profiler.stage("read_archive"):
+        with open(path, "rb") as f:
+            members = read_archive_members(f)
+
+    # Serial layout parsing, so timings do not depend on the core count;
+    # the two branches still overlap, as in the app
+    result = analyze_members(members, profiler=profiler, parallel=False, stream=stream, overlap=True)
+
+    with profiler.stage("export"):
+        generate_excel(result)
+
+    return profiler.to_dict()
+
+
+def bench_tier(name, repeat, encoding, folder, stream=None):
+    path = os.path.join(folder, f"{name}.pbit")
+    generate_pbit(path, encoding=encoding, **TIERS[name])
+
+    # Warm-up run (imports, regex/xlsxwriter first use) is discarded
+    run_once(path, stream)
+    runs = [run_once(path, stream) for _ in range(repeat)]
+
+    stages = {}
+    for run in runs:
+        for record in run["stages"]:
+            stages.setdefault(record["stage"], []).append(record["wall_s"])
+
+    return {
+        "file_bytes": os.path.getsize(path),
+        "counters": runs[0]["counters"],
+        "stages": {stage: round(statistics.median(times), 6) for stage, times in stages.items()},
+        "total_wall_s": round(statistics.median(r["total_wall_s"] for r in runs), 6)
+    }
+
+
+def compare(results, baseline, tolerance, min_delta):
+    regressions = []
+
+    for tier, data in results.items():
+        base = baseline.get(tier)
+        if base is None:
+            print(f"{tier}: no baseline")
+            continue
+
+        print(f"{tier}:")
+        timings = dict(data["stages"], total=data["total_wall_s"])
+        for stage, seconds in timings.items():
+            before = base["total_wall_s"] if stage == "total" else base["stages"].get(stage)
+            if before is None:
+                print(f"  {stage:<18}{seconds:>10.4f}s   (new)")
+                continue
+
+            ratio = seconds / before if before else float("inf")
+            flag = ""
+            if seconds > before * (1 + tolerance) and seconds - before > min_delta:
+                flag = "  REGRESSION"
+                regressions.append((tier, stage))
+            print(f"  {stage:<18}{seconds:>10.4f}s  baseline {before:.4f}s  x{ratio:.2f}{flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic models.")
+    parser.add_argument("--tiers", nargs="+", default=["small", "medium"], choices=list(TIERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--encoding", default="utf-16-le", choices=["utf-16-le", "utf-8"])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--stream", action="store_true", help="force the streaming Layout parser")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown ratio")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="ignore differences below N seconds")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for name in args.tiers:
+            results[name] = bench_tier(name, args.repeat, args.encoding, folder, args.stream or None)
+            print(f"{name}: {results[name]['file_bytes']:,} bytes, "
+                  f"{results[name]['total_wall_s']:.4f}s total")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(json.dumps(results, indent=2))
+        print("No baseline yet; run with --update-baseline to store one.")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Measures the cold import cost of the entry modules and fails when one
+exceeds its budget or loads a heavy library that must only be imported
+on first use.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--repeat 5] [--top 10]
+
+Each module is imported in a fresh interpreter with `python -X importtime`;
+its cumulative import time (interpreter start-up and site excluded) is
+the median over the repeats, after one discarded run that writes the
+.pyc files. Budgets and the lazily imported libraries are configured in
+config/settings.py (STARTUP_IMPORT_BUDGET_MS, STARTUP_LAZY_MODULES).
+The exit code is 1 if any module is over budget or imports one of them.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from config.settings import STARTUP_IMPORT_BUDGET_MS, STARTUP_LAZY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """
+    Imports `module` in a new interpreter and returns
+    {imported module: (self us, cumulative us)} from -X importtime.
+    """
+    # Bytecode must be cached, as in a normal install
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    # Children are printed before their parent, indented; only the
+    # subtree of `module` is kept (site and its imports are dropped)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+        if name[1:2] != " " and name.strip() != module:
+            times = {}
+
+    return times
+
+
+def measure(module, repeat):
+    # First run compiles and caches the bytecode
+    import_times(module)
+    runs = [import_times(module) for _ in range(repeat)]
+
+    cumulative_ms = statistics.median(run[module][1] for run in runs) / 1000
+    return cumulative_ms, runs[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the entry modules.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports of each module")
+    args = parser.parse_args()
+
+    failures = []
+
+    for module, budget_ms in STARTUP_IMPORT_BUDGET_MS.items():
+        cumulative_ms, times = measure(module, args.repeat)
+
+        eager = [name for name in STARTUP_LAZY_MODULES if name in times]
+        flag = ""
+        if cumulative_ms > budget_ms:
+            flag = "  OVER BUDGET"
+            failures.append(module)
+        if eager:
+            flag += "  EAGER: " + ", ".join(eager)
+            failures.append(module)
+
+        print(f"{module:<32}{cumulative_ms:>8.1f} ms  budget {budget_ms} ms{flag}")
+
+        if args.top:
+            slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+            for name, (self_us, _) in slowest:
+                print(f"    {name:<40}{self_us / 1000:>7.1f} ms")
+
+    if failures:
+        print(f"{len(set(failures))} module(s) failed the startup budget")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
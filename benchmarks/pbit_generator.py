@@ -0,0 +1,187 @@
+"""
+Generates synthetic .pbit archives of any size for benchmarking.
+
+Usage (from the repository root):
+    python -m benchmarks.pbit_generator out.pbit --tables 50 --columns 40 --measures 1000 \
+        --chain-depth 8 --fan-out 3 --visuals 500 --pages 20 --encoding utf-16-le
+
+The model has N tables of M columns (the first column of each table
+is a key related to the previous table) and K measures arranged in
+chains: level 0 aggregates columns, every next level references the
+measure one level down plus `fan_out - 1` other measures/columns.
+Visuals spread over P pages select columns and measures through
+aliased prototype queries, and page filters repeat across pages like
+they do in real reports.
+"""
+
+import argparse
+import json
+import random
+import zipfile
+
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+
+
+def table_name(i):
+    # Spaces force quoted 'Table Name'[Column] references in DAX
+    return f"Fact Table {i}" if i % 3 == 0 else f"Dim{i}"
+
+
+def build_schema(tables, columns, measures, chain_depth, fan_out, rng):
+
+    model_tables = []
+    measure_names = []
+
+    for t in range(tables):
+        name = table_name(t)
+        model_tables.append({
+            "name": name,
+            "columns": [{"name": f"Col {c}", "dataType": "int64"} for c in range(columns)],
+            "measures": []
+        })
+
+    for k in range(measures):
+        t = k % tables
+        level = k % max(chain_depth, 1)
+        table = model_tables[t]
+        msr_name = f"Measure {k}"
+
+        if level == 0:
+            refs = [f"SUM('{table_name(t)}'[Col {rng.randrange(columns)}])"]
+        else:
+            refs = [f"[Measure {k - 1}]"]
+
+        for _ in range(fan_out - 1):
+            if measure_names and rng.random() < 0.5:
+                refs.append(f"[{rng.choice(measure_names)}]")
+            else:
+                other = rng.randrange(tables)
+                refs.append(f"SUM('{table_name(other)}'[Col {rng.randrange(columns)}])")
+
+        expression = [
+            f"// level {level} of chain {k // max(chain_depth, 1)}",
+            "VAR label = \"[not a reference]\"",
+            "RETURN " + " + ".join(refs)
+        ]
+        table["measures"].append({"name": msr_name, "expression": expression})
+        measure_names.append(msr_name)
+
+    # One calculated column per table, so column lineage is exercised
+    for t, table in enumerate(model_tables):
+        table["columns"].append({
+            "name": "Calc",
+            "type": "calculated",
+            "expression": f"'{table_name(t)}'[Col 0] * 2"
+        })
+
+    relationships = [
+        {
+            "name": f"rel{t}",
+            "fromTable": table_name(t),
+            "fromColumn": "Col 0",
+            "toTable": table_name(t - 1),
+            "toColumn": "Col 0"
+        }
+        for t in range(1, tables)
+    ]
+
+    return {"name": "Synthetic", "model": {"tables": model_tables, "relationships": relationships}}
+
+
+def build_layout(schema, visuals, pages, rng):
+
+    tables = schema["model"]["tables"]
+    sections = [
+        {
+            "name": f"Section{p}",
+            "displayName": f"Page {p}",
+            "filters": json.dumps([_filter(tables[p % len(tables)]["name"], "Col 1")]),
+            "visualContainers": []
+        }
+        for p in range(max(pages, 1))
+    ]
+
+    for v in range(visuals):
+        table = rng.choice(tables)
+        column = rng.choice(table["columns"])["name"]
+        measure_table = rng.choice([t for t in tables if t["measures"]] or tables)
+        measure = rng.choice(measure_table["measures"])["name"] if measure_table["measures"] else None
+
+        select = [_select("c", "Column", table["name"], column)]
+        sources = [{"Name": "c", "Entity": table["name"], "Type": 0}]
+        if measure:
+            select.append(_select("m", "Measure", measure_table["name"], measure))
+            sources.append({"Name": "m", "Entity": measure_table["name"], "Type": 0})
+
+        query = {"Version": 2, "From": sources, "Select": select}
+        config = {
+            "name": f"visual{v}",
+            "singleVisual": {"visualType": "clusteredColumnChart", "prototypeQuery": query}
+        }
+
+        sections[v % len(sections)]["visualContainers"].append({
+            "x": 0, "y": 0, "z": 0, "width": 300, "height": 200,
+            "config": json.dumps(config),
+            "filters": "[]",
+            "query": json.dumps({"Commands": [{"SemanticQueryDataShapeCommand": {"Query": query}}]}),
+            "dataTransforms": json.dumps({"selects": [{"queryName": s["Name"]} for s in select]})
+        })
+
+    return {"id": 0, "sections": sections, "config": "{}"}
+
+
+def _select(alias, kind, entity, prop):
+    return {
+        kind: {"Expression": {"SourceRef": {"Source": alias}}, "Property": prop},
+        "Name": f"{entity}.{prop}"
+    }
+
+
+def _filter(entity, prop):
+    return {
+        "name": f"Filter{entity}{prop}",
+        "expression": {"Column": {"Expression": {"SourceRef": {"Entity": entity}}, "Property": prop}},
+        "type": "Categorical"
+    }
+
+
+def generate_pbit(path, tables=10, columns=20, measures=50, chain_depth=3, fan_out=2,
+                  visuals=20, pages=2, encoding="utf-16-le", seed=0):
+    """Writes a synthetic .pbit to `path` and returns the path."""
+    rng = random.Random(seed)
+
+    schema = build_schema(tables, columns, measures, chain_depth, fan_out, rng)
+    layout = build_layout(schema, visuals, pages, rng)
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("Version", "1.28".encode(encoding))
+        archive.writestr(SCHEMA_FILE_NAME, json.dumps(schema, indent=2).encode(encoding))
+        archive.writestr(LAYOUT_FILE_PATH, json.dumps(layout).encode(encoding))
+        archive.writestr("DataMashup", bytes(rng.randrange(256) for _ in range(4096)))
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic .pbit archive.")
+    parser.add_argument("path")
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--measures", type=int, default=50)
+    parser.add_argument("--chain-depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=2)
+    parser.add_argument("--visuals", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--encoding", default="utf-16-le", choices=["utf-16-le", "utf-16-be", "utf-8"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_pbit(
+        args.path, args.tables, args.columns, args.measures, args.chain_depth,
+        args.fan_out, args.visuals, args.pages, args.encoding, args.seed
+    )
+    print(args.path)
+
+
+if __name__ == "__main__":
+    main()
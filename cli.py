@@ -0,0 +1,83 @@
+"""
+Headless batch analysis of Power BI templates and reports.
+
+Usage:
+    python cli.py TEMPLATES_DIR [more dirs or globs ...] [--workers 8] [--output results.jsonl]
+    python cli.py REPORTS_DIR --schema model.pbit
+    python cli.py REPORTS_DIR --schema model.pbit --shared
+    python cli.py TEMPLATES_DIR --index
+    python cli.py TEMPLATES_DIR --trace-memory
+
+Writes one JSON line per .pbit / .pbix as soon as it finishes and
+prints the overall throughput to stderr at the end. A .pbix is read
+for its Report/Layout only and paired with --schema (.pbit or model
+JSON) or with the schema cached from the .pbit of the same name.
+With --shared, all reports are analyzed as thin reports of the one
+--schema model and a single line with the union and per-report usage
+is written. With --index, every analysis is also stored in the SQLite
+usage index (config.settings.USAGE_INDEX_PATH) for cross-report lookups.
+With --trace-memory, each stage of the profile also gets its tracemalloc
+peak (several times slower).
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from config.settings import BATCH_WORKERS, PROFILE_TRACE_MEMORY
+from services.batch_service import find_report_files, run_batch, analyze_shared
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or glob of .pbit / .pbix files.")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of .pbit / .pbix files")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output", help="JSONL file to write (default: stdout)")
+    parser.add_argument("--schema", help="model for .pbix files: a .pbit or a DataModelSchema / model.bim JSON")
+    parser.add_argument("--shared", action="store_true", help="treat all reports as thin reports of the --schema model")
+    parser.add_argument("--index", action="store_true", help="store every analysis in the usage index")
+    parser.add_argument(
+        "--trace-memory", action=argparse.BooleanOptionalAction, default=PROFILE_TRACE_MEMORY,
+        help="record the tracemalloc peak of each stage (slower)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.shared and not args.schema:
+        parser.error("--shared needs --schema")
+
+    paths = find_report_files(args.inputs)
+    if not paths:
+        print("No .pbit or .pbix files found.", file=sys.stderr)
+        return 1
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failed = 0
+    start = time.perf_counter()
+
+    if args.shared:
+        records = [analyze_shared(paths, args.schema, args.workers, args.trace_memory)]
+    else:
+        records = run_batch(paths, args.workers, args.schema, args.index, args.trace_memory)
+
+    try:
+        for record in records:
+            if record["status"] != "ok":
+                failed += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(paths)} files ({failed} failed) in {elapsed:.2f}s: "
+        f"{len(paths) / elapsed if elapsed else 0:.2f} files/s",
+        file=sys.stderr
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,76 @@ import os
 APP_NAME = "Power BI SaaS Analyzer"
 APP_VERSION = "1.0.0"
 
-# Workspace
-WORKSPACE_FOLDER = os.path.join(os.getcwd(), "workspace")
+# Background Analysis (process pool shared by all Streamlit sessions);
+# a large layout adds one process per run (see LAYOUT_OVERLAP_MIN_BYTES)
+ANALYSIS_WORKERS = 2
+
+# Analysis Cache (shared by all worker processes on this host); the
+# limits cover results, schemas and snapshots together
+CACHE_FOLDER = os.path.join(os.getcwd(), "cache")
+CACHE_MAX_ENTRIES = 500
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Model schemas of analyzed .pbit files, paired with .pbix reports later
+SCHEMA_CACHE_FOLDER = os.path.join(CACHE_FOLDER, "schemas")
+
+# Per-object digests of the last analysis of each report (re-analysis of new versions)
+SNAPSHOT_CACHE_FOLDER = os.path.join(CACHE_FOLDER, "snapshots")
+
+# Usage Index (SQLite database of every analyzed report, for cross-report lookups)
+USAGE_INDEX_PATH = os.path.join(os.getcwd(), "index", "usage.sqlite3")
+
+# Layout Parsing (process pool only pays off for large reports)
+LAYOUT_PARALLEL_MIN_CHARS = 8 * 1024 * 1024
+LAYOUT_PARSE_WORKERS = None  # None = one per CPU
+
+# Layout branch in a process of its own, overlapping the model branch
+# (process start-up and pickling only pay off for large reports)
+LAYOUT_OVERLAP_MIN_BYTES = 1024 * 1024
+
+# Streaming Layout parsing (one visual in memory at a time) for huge reports
+LAYOUT_STREAM_MIN_BYTES = 64 * 1024 * 1024
+LAYOUT_STREAM_CHUNK_BYTES = 1024 * 1024
+
+# Batch Mode
+BATCH_WORKERS = None  # None = one per CPU
+
+# Shared Dataset Mode (report layouts scanned in parallel against one model)
+SHARED_DATASET_WORKERS = None  # None = one per CPU
+
+# Watch Mode (python watch.py FOLDER)
+WATCH_OUTPUT_FOLDER = os.path.join(os.getcwd(), "watch_results")
+WATCH_POLL_SECONDS = 2.0
+WATCH_DEBOUNCE_SECONDS = 5.0  # a file must keep its size and mtime this long before it is analyzed
+WATCH_WORKERS = None          # None = one per CPU
+WATCH_MAX_QUEUED = 64         # files waiting for a worker; scanning pauses beyond that
+
+# Startup Budget (benchmarks/bench_startup.py): cold import time of each
+# entry module in ms, and heavy libraries that may only load on first use
+STARTUP_IMPORT_BUDGET_MS = {
+    "services.analysis_service": 60,
+    "services.incremental_service": 60,
+    "services.export_service": 15,
+    "services.batch_service": 100,
+    "cli": 120,
+    "watch": 200,
+    "ui.components": 600,  # mostly streamlit itself
+    "app": 700
+}
+STARTUP_LAZY_MODULES = ("pandas", "openpyxl", "xlsxwriter")
+
+# Profiling: opt-in tracemalloc peak of each stage (makes analysis several times
+# slower); default of cli.py --trace-memory and of the app's checkbox
+PROFILE_TRACE_MEMORY = False
+
+# Dashboard
+FIELD_LIST_PAGE_SIZE = 200
+
+# Lineage explorer: hops offered, nodes drawn at most, neighborhoods kept per result
+LINEAGE_MAX_HOPS = 6
+LINEAGE_DEFAULT_HOPS = 2
+LINEAGE_MAX_NODES = 150
+LINEAGE_CACHE_SIZE = 256
 
 # Export
 EXPORT_FILE_NAME = "PowerBI_Model_Analysis.xlsx"
@@ -2,6 +2,18 @@
 SCHEMA_FILE_NAME = "DataModelSchema"
 LAYOUT_FILE_PATH = "Report/Layout"
 
+# Report file types (.pbix embeds the data model instead of its schema)
+PBIT_EXTENSION = ".pbit"
+PBIX_EXTENSION = ".pbix"
+
+# JSON-encoded string properties of the report, pages and visuals
+EMBEDDED_JSON_KEYS = [
+    "filters",
+    "query",
+    "config",
+    "dataTransforms"
+]
+
 # Encoding Priority
 SUPPORTED_ENCODINGS = [
     "utf-16-le",
@@ -15,6 +27,3 @@ SYSTEM_DATE_ANNOTATIONS = [
     "__PBI_LocalDateTable"
 ]
 
-# DAX Regex Pattern
-DAX_DEPENDENCY_PATTERN = r"([A-Za-z0-9_ ]+)\[([A-Za-z0-9_ ]+)\]"
-
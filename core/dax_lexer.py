@@ -0,0 +1,88 @@
+import re
+
+# One alternation per DAX token class. Every branch is a simple
+# unrolled loop with no nested quantifiers, so scanning is linear in the
+# expression length. Unterminated strings/comments run to the end.
+_TOKEN_PATTERN = re.compile(r"""
+      (?P<comment>//[^\n]*|--[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<string>"[^"]*(?:""[^"]*)*"?)
+    | (?P<quoted>'[^']*(?:''[^']*)*'?)
+    | (?P<bracket>\[[^\]]*(?:\]\][^\]]*)*\]?)
+    | (?P<ident>[^\W\d][\w.]*)
+    | (?P<number>\d[\w.]*)
+    | (?P<space>\s+)
+    | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Unquoted words that can precede a bracket without being a table name
+_KEYWORDS = {
+    "VAR", "RETURN", "IN", "NOT", "AND", "OR", "ASC", "DESC",
+    "DEFINE", "EVALUATE", "MEASURE", "COLUMN", "TABLE", "ORDER", "BY",
+    "START", "AT", "TRUE", "FALSE"
+}
+
+COLUMN_REF = "column"    # Table[Name]  (column, or a table-qualified measure)
+MEASURE_REF = "measure"  # [Name]       (measure, or a row-context column)
+TABLE_REF = "table"      # 'Table' / Table used on its own
+
+
+def tokenize(expression):
+    """
+    Yields (kind, text) for every significant DAX token.
+    Whitespace and comments are dropped.
+    """
+    for match in _TOKEN_PATTERN.finditer(expression):
+        kind = match.lastgroup
+        if kind not in ("space", "comment"):
+            yield kind, match.group()
+
+
+def dax_references(expression):
+    """
+    Yields (kind, table, name) for every object reference in a DAX
+    expression, where kind is COLUMN_REF, MEASURE_REF or TABLE_REF.
+    String literals and comments are skipped, quoted table names and
+    escaped ']]' / "''" are handled.
+    """
+    if isinstance(expression, list):
+        # Multi-line expressions are stored as a list of lines
+        expression = "\n".join(expression)
+
+    if not isinstance(expression, str):
+        return
+
+    pending_table = None
+
+    for kind, text in tokenize(expression):
+
+        if kind == "bracket":
+            name = _unescape_bracket(text)
+            if pending_table is not None:
+                yield COLUMN_REF, pending_table, name
+            else:
+                yield MEASURE_REF, None, name
+            pending_table = None
+            continue
+
+        if pending_table is not None and not (kind == "other" and text == "("):
+            # Table name not followed by [ or ( (a function call)
+            yield TABLE_REF, pending_table, None
+        pending_table = None
+
+        if kind == "quoted":
+            pending_table = _unescape_quoted(text)
+        elif kind == "ident" and text.upper() not in _KEYWORDS:
+            pending_table = text
+
+    if pending_table is not None:
+        yield TABLE_REF, pending_table, None
+
+
+def _unescape_quoted(text):
+    body = text[1:-1] if text.endswith("'") and len(text) > 1 else text[1:]
+    return body.replace("''", "'").strip()
+
+
+def _unescape_bracket(text):
+    body = text[1:-1] if text.endswith("]") and len(text) > 1 else text[1:]
+    return body.replace("]]", "]").strip()
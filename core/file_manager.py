@@ -1,25 +1,17 @@
-import os
-import shutil
 import zipfile
 
-def prepare_workspace():
-    base_path = os.path.join(os.getcwd(), "workspace")
-
-    if os.path.exists(base_path):
-        shutil.rmtree(base_path)
-
-    os.makedirs(base_path, exist_ok=True)
-    return base_path
-
-
-def extract_zip(uploaded_file, base_path):
-    file_path = os.path.join(base_path, uploaded_file.name)
-
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    with zipfile.ZipFile(file_path, 'r') as zip_ref:
-        zip_ref.extractall(base_path)
-
-    return base_path
-
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+
+def read_archive_members(source, members=(SCHEMA_FILE_NAME, LAYOUT_FILE_PATH)):
+    """
+    Reads only the requested members of a .pbit / .pbix archive into
+    memory. `source` can be a path or any seekable file object (e.g. a
+    Streamlit upload), so nothing is written to or extracted onto disk.
+    Entries are located through the central directory, so other members
+    are skipped without being read.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    with zipfile.ZipFile(source, 'r') as zip_ref:
+        return {name: zip_ref.read(name) for name in members}
@@ -1,14 +1,70 @@
+import codecs
 import json
 
+from core.constants import SUPPORTED_ENCODINGS
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be")
+]
+
+# Running counters so callers can confirm each document is decoded once
+_stats = {"documents": 0, "decodes": 0}
+
+
 def load_json(path):
     with open(path, "rb") as f:
         raw = f.read()
 
-    for enc in ["utf-16-le", "utf-16-be", "utf-8"]:
+    return loads_json(raw, path)
+
+
+def detect_encoding(raw):
+    """
+    Returns (encoding, bom_length) from the BOM or, without one, from the
+    null-byte pattern of the first two bytes. Power BI JSON always starts
+    with an ASCII character, so one of the two bytes is 0 in UTF-16.
+    """
+    head = bytes(raw[:4])
+
+    for bom, enc in _BOMS:
+        if head.startswith(bom):
+            return enc, len(bom)
+
+    if len(head) >= 2:
+        if head[0] == 0 and head[1] != 0:
+            return "utf-16-be", 0
+        if head[0] != 0 and head[1] == 0:
+            return "utf-16-le", 0
+
+    return "utf-8", 0
+
+
+def loads_json(raw, name="<bytes>"):
+
+    _stats["documents"] += 1
+
+    enc, bom_length = detect_encoding(raw)
+    body = memoryview(raw)[bom_length:]  # skip the BOM without copying
+
+    # Sniffed encoding first; the others are only tried if it is wrong
+    candidates = [enc] + [e for e in SUPPORTED_ENCODINGS if e != enc]
+
+    for enc in candidates:
+        _stats["decodes"] += 1
         try:
-            return json.loads(raw.decode(enc))
-        except:
+            return json.loads(str(body, enc))
+        except ValueError:
             continue
 
-    raise Exception(f"Unable to decode {path}")
+    raise Exception(f"Unable to decode {name}")
+
+
+def decode_stats():
+    return dict(_stats)
+
 
+def reset_decode_stats():
+    _stats["documents"] = 0
+    _stats["decodes"] = 0
@@ -0,0 +1,162 @@
+import codecs
+import json
+import re
+
+from config.settings import LAYOUT_STREAM_CHUNK_BYTES
+from core.json_loader import detect_encoding
+
+# Structural characters; string bodies are skipped with _STRING_BODY so
+# brackets inside embedded JSON strings (config, query, ...) are ignored
+_STRUCTURE = re.compile(r'["{}\[\]]')
+
+# Longest run of string content; stops at the closing quote, or before
+# a trailing lone backslash whose escaped character is in the next chunk
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+# Object keys are short; longer strings are never compared
+_MAX_KEY_LENGTH = 64
+
+_DECODER = json.JSONDecoder()
+
+REPORT = "report"    # top-level object, with "sections": []
+SECTION = "section"  # one page, with "visualContainers": []
+VISUAL = "visual"    # one visual container
+
+
+def iter_text_chunks(raw, chunk_bytes=LAYOUT_STREAM_CHUNK_BYTES):
+    """Decodes `raw` piece by piece, never holding the whole text."""
+    enc, bom_length = detect_encoding(raw)
+    decoder = codecs.getincrementaldecoder(enc)()
+    body = memoryview(raw)[bom_length:]
+
+    for start in range(0, len(body), chunk_bytes):
+        yield decoder.decode(body[start:start + chunk_bytes])
+
+    yield decoder.decode(b"", final=True)
+
+
+def iter_layout_objects(raw, chunk_bytes=LAYOUT_STREAM_CHUNK_BYTES):
+    """
+    Streams a Report/Layout document and yields (kind, dict) for every
+    visual container, then every page (its visualContainers emptied)
+    and finally the report itself (its sections emptied).
+
+    Only the text of the object being built is buffered: memory is
+    bounded by the largest visual / page header, not the whole report.
+    """
+    buf = ""
+    pos = 0          # next character to scan
+    mark = None      # start of the text still needed
+    string_start = None
+    resume = 0       # where an unfinished string body continues
+    key = None       # last short string (the key before a value)
+
+    roles = []
+    report_head = None
+    section_head = None
+
+    for chunk in iter_text_chunks(raw, chunk_bytes):
+        buf += chunk
+
+        while True:
+
+            if string_start is not None:
+                end = _STRING_BODY.match(buf, resume).end()
+                if end >= len(buf):
+                    resume = end
+                    break
+                if len(buf) - 1 == end and buf[end] == "\\":
+                    resume = end
+                    break
+
+                key = buf[string_start + 1:end] if end - string_start <= _MAX_KEY_LENGTH else None
+                string_start = None
+                pos = end + 1
+                continue
+
+            match = _STRUCTURE.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+
+            i = match.start()
+            char = buf[i]
+            pos = i + 1
+
+            if char == '"':
+                string_start = i
+                resume = i + 1
+                continue
+
+            if char == "{" or char == "[":
+                parent = roles[-1] if roles else None
+
+                if not roles:
+                    role = REPORT
+                    mark = i
+                elif parent == REPORT and char == "[" and key == "sections":
+                    role = "sections"
+                    report_head = buf[mark:i + 1]
+                    mark = None
+                elif parent == "sections" and char == "{":
+                    role = SECTION
+                    mark = i
+                elif parent == SECTION and char == "[" and key == "visualContainers":
+                    role = "visuals"
+                    section_head = buf[mark:i + 1]
+                    mark = None
+                elif parent == "visuals" and char == "{":
+                    # A visual already fully buffered is decoded in one
+                    # C call; one cut by the chunk end is scanned below
+                    try:
+                        obj, pos = _DECODER.raw_decode(buf, i)
+                    except ValueError:
+                        role = VISUAL
+                        mark = i
+                    else:
+                        yield VISUAL, obj
+                        continue
+                else:
+                    role = "other"
+
+                roles.append(role)
+                continue
+
+            # Closing } or ]
+            if not roles:
+                raise ValueError("Unbalanced Report/Layout document")
+            role = roles.pop()
+
+            if role == VISUAL:
+                yield VISUAL, json.loads(buf[mark:i + 1])
+                mark = None
+
+            elif role == "visuals" or role == "sections":
+                # The closing bracket starts the owner's tail text
+                mark = i
+
+            elif role == SECTION:
+                text = buf[mark:i + 1]
+                yield SECTION, json.loads(section_head + text if section_head else text)
+                section_head = None
+                mark = None
+
+            elif role == REPORT:
+                text = buf[mark:i + 1]
+                yield REPORT, json.loads(report_head + text if report_head else text)
+                report_head = None
+                mark = None
+
+        # Drop everything before the earliest offset still needed
+        cut = min(x for x in (mark, string_start, pos) if x is not None)
+        if cut:
+            buf = buf[cut:]
+            pos -= cut
+            resume -= cut
+            if mark is not None:
+                mark -= cut
+            if string_start is not None:
+                string_start -= cut
+
+    if roles or string_start is not None:
+        raise ValueError("Truncated Report/Layout document")
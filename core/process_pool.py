@@ -0,0 +1,129 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# ---------------------------------------------
+# Long-lived pool (UI, batch, folder watcher)
+# ---------------------------------------------
+class RetryingPool:
+    """
+    ProcessPoolExecutor that replaces itself when it breaks.
+
+    A worker process that dies (e.g. out of memory) breaks the pool and
+    every run in flight. The pool is replaced for the next runs, and
+    each broken run is retried once, one at a time, in a process of its
+    own: the run that killed its worker fails alone instead of breaking
+    the retries of the others again. At most one process runs retries
+    on top of `workers`.
+    """
+    __slots__ = ("workers", "pool", "_lock", "_retries", "_retrying")
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._retries = deque()
+        self._retrying = False
+
+    def submit(self, fn, *args):
+        """Future of fn(*args) in the pool, retried once if the pool breaks."""
+        future = _RetriedFuture()
+        pool = self.pool
+        try:
+            attempt = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._retry(future, pool, fn, args)
+            return future
+
+        future.attempt = attempt
+        attempt.add_done_callback(lambda done: self._finish(future, pool, done, fn, args))
+        return future
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            while self._retries:
+                self._retries.popleft()[0].cancel()
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ---------------------------------------------
+    # Internal helpers
+    # ---------------------------------------------
+    def _finish(self, future, pool, attempt, fn, args):
+        if future.done():
+            # Cancelled by the caller while the attempt ran
+            return
+
+        if attempt.cancelled():
+            future.cancel()
+            future.set_running_or_notify_cancel()
+            return
+
+        error = attempt.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._retry(future, pool, fn, args)
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(attempt.result())
+
+    def _retry(self, future, pool, fn, args):
+        with self._lock:
+            # Every run in flight reports the same broken pool: only the
+            # first replaces it
+            if self.pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+            self._retries.append((future, fn, args))
+            if not self._retrying:
+                self._retrying = True
+                threading.Thread(target=self._run_retries, daemon=True).start()
+
+    def _run_retries(self):
+        while True:
+            with self._lock:
+                if not self._retries:
+                    self._retrying = False
+                    return
+                future, fn, args = self._retries.popleft()
+
+            if future.done():
+                continue
+
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                future.attempt = attempt = pool.submit(fn, *args)
+                try:
+                    future.set_result(attempt.result())
+                except Exception as e:
+                    # BrokenProcessPool again: this run kills its worker
+                    future.set_exception(e)
+
+
+class _RetriedFuture(Future):
+    """Future of a RetryingPool run; running() tells whether its current attempt started."""
+
+    def __init__(self):
+        super().__init__()
+        self.attempt = None
+
+    def running(self):
+        attempt = self.attempt
+        return not self.done() and attempt is not None and attempt.running()
+
+
+# ---------------------------------------------
+# Short-lived pool (one large job)
+# ---------------------------------------------
+def run_with_pool(workers, work):
+    """
+    Returns work(pool) for a fresh ProcessPoolExecutor of `workers`
+    processes, or None when no usable process pool can run here
+    (sandboxed host, or a worker died): the caller then goes serial.
+    """
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return work(pool)
+    except (OSError, BrokenProcessPool):
+        return None
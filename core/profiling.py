@@ -0,0 +1,146 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from config.settings import PROFILE_TRACE_MEMORY
+
+
+class StageProfiler:
+    """
+    Records wall time and CPU time per pipeline stage, plus input size
+    counters (bytes, visuals, expressions, ...). With trace_memory=True
+    it also records the tracemalloc peak of each stage and of the run.
+
+    CPU time is per thread, so stages running concurrently in different
+    threads are not charged for each other. A stage run in another
+    process (see run_branches()) is merged with its end time, so the
+    total wall time counts it once where it overlapped ours. The traced
+    peak is process-wide: a stage's peak includes what other stages of
+    the process allocated while it was open.
+    """
+
+    def __init__(self, trace_memory=PROFILE_TRACE_MEMORY):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.counters = {}
+
+        self.peak_bytes = None
+
+        self._lock = threading.Lock()
+        self._open_peaks = {}
+        self._started_tracing = False
+        self._intervals = []
+        self._merged_wall = 0.0
+
+    def __getstate__(self):
+        # Sent to worker processes (e.g. with the function to run)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        token = object()
+
+        if self.trace_memory:
+            with self._lock:
+                # Tracing starts with the first open stage and stops with
+                # the last one, so concurrent stages share one session
+                if not self._open_peaks:
+                    if tracemalloc.is_tracing():
+                        tracemalloc.reset_peak()
+                    else:
+                        tracemalloc.start()
+                        self._started_tracing = True
+                else:
+                    self._fold_peak()
+                self._open_peaks[token] = 0
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+
+        try:
+            yield
+        finally:
+            wall_end = time.perf_counter()
+            record = {
+                "stage": name,
+                "wall_s": round(wall_end - wall_start, 6),
+                "cpu_s": round(time.thread_time() - cpu_start, 6)
+            }
+
+            with self._lock:
+                if self.trace_memory:
+                    self._fold_peak()
+                    record["peak_bytes"] = self._open_peaks.pop(token)
+                    if not self._open_peaks and self._started_tracing:
+                        tracemalloc.stop()
+                        self._started_tracing = False
+
+                self.stages.append(record)
+                self._intervals.append((wall_start, wall_end))
+
+    def _fold_peak(self):
+        # tracemalloc keeps a single peak: it is handed to every open
+        # stage and to the run, then reset for whatever opens or closes next
+        peak = tracemalloc.get_traced_memory()[1]
+        for token, open_peak in self._open_peaks.items():
+            if peak > open_peak:
+                self._open_peaks[token] = peak
+        self._record_peak(peak)
+        tracemalloc.reset_peak()
+
+    def _record_peak(self, peak_bytes):
+        if peak_bytes is not None and (self.peak_bytes is None or peak_bytes > self.peak_bytes):
+            self.peak_bytes = peak_bytes
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other, end=None):
+        """
+        Appends another profiler's data (e.g. one returned by a worker).
+        With `end` (its time.perf_counter() when it finished), its wall
+        time is an interval ending there, counted once with ours.
+        """
+        if other is None:
+            return
+        self.stages.extend(other["stages"])
+        if end is None:
+            self._merged_wall += other["total_wall_s"]
+        else:
+            with self._lock:
+                self._intervals.append((end - other["total_wall_s"], end))
+        with self._lock:
+            self._record_peak(other.get("peak_bytes"))
+        for name, value in other["counters"].items():
+            self.count(name, value)
+
+    def wall_time(self):
+        """Union of the stage intervals plus merged totals."""
+        total = self._merged_wall
+        end = None
+        for start, stop in sorted(self._intervals):
+            if end is None or start >= end:
+                total += stop - start
+                end = stop
+            elif stop > end:
+                total += stop - end
+                end = stop
+        return total
+
+    def to_dict(self):
+        data = {
+            "stages": list(self.stages),
+            "counters": dict(self.counters),
+            "total_wall_s": round(self.wall_time(), 6)
+        }
+        if self.peak_bytes is not None:
+            data["peak_bytes"] = self.peak_bytes
+        return data
@@ -1,22 +1,289 @@
+from models.field_table import FieldTable
+from models.symbol_table import split_field
+
+
+def field_order(columns, measures):
+    """Field names in AnalysisResult id order: sorted columns, then sorted measures."""
+    return list(dict.fromkeys(sorted(columns) + sorted(measures)))
+
+
 class AnalysisResult:
+    """
+    Final categorization of one model. Fields are interned once in a
+    FieldTable; every category is an int bitset over their ids and the
+    named sets below are derived from them with bitwise operations.
+    """
+    __slots__ = (
+        "fields",
+        "tables",
+        "relationships",
+        "dependency_cycles",
+        "dependency_edges",
+        "relationship_links",
+        "visuals",
+        "visual_bits",
+        "profile",
+        "column_bits",
+        "measure_bits",
+        "direct_bits",
+        "relationship_bits",
+        "used_bits"
+    )
+
+    def __init__(self, tables=(), columns=(), measures=(), relationships=0):
+        self.fields = FieldTable(field_order(columns, measures))
+
+        self.tables = sorted(t for t in tables if t is not None)
+        self.relationships = relationships
+        self.dependency_cycles = []
+        self.dependency_edges = []
+
+        # (from column id, to column id) per model relationship
+        self.relationship_links = []
+
+        # (page, visual label) and the bitset of fields each one uses
+        self.visuals = []
+        self.visual_bits = []
+
+        # Stage timings of the run that produced this result (not cached)
+        self.profile = None
+
+        self.column_bits = self.fields.bits(columns)
+        self.measure_bits = self.fields.bits(measures)
+        self.direct_bits = 0
+        self.relationship_bits = 0
+        self.used_bits = 0
+
+    # ---------------------------------------------
+    # Usage marking
+    # ---------------------------------------------
+    def mark_direct(self, used_fields):
+        self.direct_bits |= self.fields.bits(used_fields)
+        self.used_bits |= self.direct_bits
+
+    def mark_relationship(self, relationship_columns):
+        self.relationship_bits |= self.fields.bits(relationship_columns) & self.column_bits
+        self.used_bits |= self.relationship_bits
+
+    def add_relationship_links(self, relationship_pairs):
+        ids = self.fields.ids
+        self.relationship_links.extend(
+            (ids[a], ids[b]) for a, b in relationship_pairs if a in ids and b in ids
+        )
+
+    def add_visuals(self, visual_usage):
+        """Keeps which fields every visual (and report/page filter) uses."""
+        ids = self.fields.ids
+        for page, label, used_fields in visual_usage:
+            # Visuals use a handful of fields: set bits one by one
+            bits = 0
+            for field in used_fields:
+                field_id = ids.get(field)
+                if field_id is not None:
+                    bits |= 1 << field_id
+            self.visuals.append((page, label))
+            self.visual_bits.append(bits)
+
+    def propagate(self, dependency_graph):
+        """
+        Adds everything the used fields depend on, transitively, and
+        keeps the graph's edges as sorted (source id, target id) pairs.
+        """
+        lineage = dependency_graph.closure(self.fields.fields(self.used_bits))
+        self.used_bits |= self.fields.bits(lineage)
+        self.dependency_edges = self._edge_ids(dependency_graph)
+
+    def propagate_changes(self, dependency_graph, previous, changed_fields):
+        """
+        propagate() for a model with the same fields as the analysis
+        `previous` (a GraphState) whose DAX edges differ only at
+        `changed_fields`; the graph's node ids are this result's field
+        ids (DependencyGraph.from_edges(previous.fields, ...)).
+
+        The earlier closure is kept except for the fields that may have
+        lost their support (lost seeds, targets a changed field no
+        longer references, and everything they lead to); those are
+        used again only if something still used reaches them.
+        """
+        ids = self.fields.ids
+        forward = dependency_graph.forward
+        changed = {ids[field] for field in changed_fields}
+
+        old_targets = {}
+        kept_edges = []
+        for edge in previous.edges:
+            if edge[0] in changed:
+                old_targets.setdefault(edge[0], []).append(edge[1])
+            else:
+                kept_edges.append(edge)
+
+        # The kept edges are sorted already: the sort mostly merges in the new ones
+        self.dependency_edges = sorted(kept_edges + [
+            (source, target) for source in changed for target in forward[source]
+        ])
+
+        seeds = self.used_bits
+        was_used = set(self.fields.positions(previous.used_bits))
+
+        doubtful = set()
+        stack = self.fields.positions(previous.seed_bits & ~seeds)
+        for source in changed & was_used:
+            stack.extend(set(old_targets.get(source, ())).difference(forward[source]))
 
-    def __init__(self):
-        self.tables = set()
-        self.columns = set()
-        self.measures = set()
+        # Old and new edges both count: either may have carried the support
+        while stack:
+            node = stack.pop()
+            if node in was_used and node not in doubtful:
+                doubtful.add(node)
+                stack.extend(forward[node])
+                stack.extend(old_targets.get(node, ()))
 
-        self.used_columns = set()
-        self.unused_columns = set()
+        kept = was_used - doubtful
+        restart = [node for node in self.fields.positions(seeds) if node not in kept]
+        restart.extend(
+            node for node in doubtful
+            if any(dependent in kept for dependent in dependency_graph.reverse[node])
+        )
+        for source in changed & kept:
+            restart.extend(forward[source])
 
-        self.used_measures = set()
-        self.unused_measures = set()
+        reached = dependency_graph.closure_ids(restart)
+        self.used_bits = seeds | self.fields.id_bits(kept) | self.fields.id_bits(reached)
+
+    def _edge_ids(self, dependency_graph):
+        ids = self.fields.ids
+        to_field = [ids.get(name) for name in dependency_graph.names]
+        return sorted(
+            (to_field[source_id], to_field[target_id])
+            for source_id, targets in enumerate(dependency_graph.forward)
+            if to_field[source_id] is not None
+            for target_id in targets
+            if to_field[target_id] is not None
+        )
+
+    # ---------------------------------------------
+    # Categories (bitsets)
+    # ---------------------------------------------
+    @property
+    def indirect_column_bits(self):
+        return self.used_bits & self.column_bits & ~self.direct_bits & ~self.relationship_bits
+
+    @property
+    def indirect_measure_bits(self):
+        return self.used_bits & self.measure_bits & ~self.direct_bits
+
+    @property
+    def unused_column_bits(self):
+        return self.column_bits & ~self.used_bits
+
+    @property
+    def unused_measure_bits(self):
+        return self.measure_bits & ~self.used_bits
+
+    # ---------------------------------------------
+    # Categories (field names)
+    # ---------------------------------------------
+    @property
+    def columns(self):
+        return set(self.fields.fields(self.column_bits))
+
+    @property
+    def measures(self):
+        return set(self.fields.fields(self.measure_bits))
+
+    @property
+    def direct_columns(self):
+        return set(self.fields.fields(self.direct_bits & self.column_bits))
+
+    @property
+    def direct_measures(self):
+        return set(self.fields.fields(self.direct_bits & self.measure_bits))
+
+    @property
+    def relationship_columns(self):
+        return set(self.fields.fields(self.relationship_bits))
+
+    @property
+    def relationship_only_columns(self):
+        return set(self.fields.fields(self.relationship_bits & ~self.direct_bits))
+
+    @property
+    def indirect_columns(self):
+        return set(self.fields.fields(self.indirect_column_bits))
+
+    @property
+    def indirect_measures(self):
+        return set(self.fields.fields(self.indirect_measure_bits))
+
+    @property
+    def used_columns(self):
+        return set(self.fields.fields(self.used_bits & self.column_bits))
+
+    @property
+    def used_measures(self):
+        return set(self.fields.fields(self.used_bits & self.measure_bits))
+
+    @property
+    def unused_columns(self):
+        return set(self.fields.fields(self.unused_column_bits))
+
+    @property
+    def unused_measures(self):
+        return set(self.fields.fields(self.unused_measure_bits))
+
+    @property
+    def unused_tables(self):
+        used_bits = self.used_bits & (self.column_bits | self.measure_bits)
+        used_tables = {split_field(f)[0] for f in self.fields.fields(used_bits)}
+        return set(self.tables) - used_tables
 
     def compute_summary(self):
+        unused_tables = len(self.unused_tables)
         return {
             "Total Tables": len(self.tables),
-            "Total Columns": len(self.columns),
-            "Total Measures": len(self.measures),
-            "Unused Columns": len(self.unused_columns),
-            "Unused Measures": len(self.unused_measures)
+            "Used Tables": len(self.tables) - unused_tables,
+            "Unused Tables": unused_tables,
+            "Total Columns": self.column_bits.bit_count(),
+            "Unused Columns": self.unused_column_bits.bit_count(),
+            "Relationships": self.relationships,
+            "Total Measures": self.measure_bits.bit_count(),
+            "Unused Measures": self.unused_measure_bits.bit_count()
+        }
+
+    # ---------------------------------------------
+    # Compact serialization (field list + hex bitsets)
+    # ---------------------------------------------
+    _BITSETS = ("column_bits", "measure_bits", "direct_bits", "relationship_bits", "used_bits")
+
+    def to_dict(self):
+        data = {
+            "fields": self.fields.names,
+            "tables": self.tables,
+            "relationships": self.relationships,
+            "dependency_cycles": self.dependency_cycles,
+            "dependency_edges": [i for edge in self.dependency_edges for i in edge],
+            "relationship_links": [i for link in self.relationship_links for i in link],
+            "visuals": self.visuals,
+            "visual_bits": [format(bits, "x") for bits in self.visual_bits]
         }
+        for name in self._BITSETS:
+            data[name] = format(getattr(self, name), "x")
+        return data
 
+    @classmethod
+    def from_dict(cls, data):
+        result = cls.__new__(cls)
+        result.fields = FieldTable(data["fields"])
+        result.tables = data["tables"]
+        result.relationships = data["relationships"]
+        result.dependency_cycles = data["dependency_cycles"]
+        flat_edges = data["dependency_edges"]
+        result.dependency_edges = list(zip(flat_edges[::2], flat_edges[1::2]))
+        flat_links = data["relationship_links"]
+        result.relationship_links = list(zip(flat_links[::2], flat_links[1::2]))
+        result.visuals = [tuple(v) for v in data["visuals"]]
+        result.visual_bits = [int(bits, 16) for bits in data["visual_bits"]]
+        result.profile = None
+        for name in cls._BITSETS:
+            setattr(result, name, int(data[name], 16))
+        return result
@@ -0,0 +1,53 @@
+class FieldTable:
+    """
+    Interning table: every "Table[Name]" field gets a dense integer id.
+    Sets of fields are Python ints used as bitsets (bit i = field id i),
+    so unions, differences and counts are single bitwise operations.
+    """
+    __slots__ = ("ids", "names")
+
+    def __init__(self, fields=()):
+        # First occurrence wins, built with C-level loops
+        self.names = list(dict.fromkeys(fields))
+        self.ids = {field: field_id for field_id, field in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, field):
+        return field in self.ids
+
+    def bits(self, fields):
+        """Bitset of the known fields among `fields`; unknown ones are ignored."""
+        ids = self.ids
+        return self.id_bits(field_id for field_id in map(ids.get, fields) if field_id is not None)
+
+    def id_bits(self, field_ids):
+        """Bitset of the ids in `field_ids`."""
+        flags = bytearray(len(self.names))
+        for field_id in field_ids:
+            flags[field_id] = 1
+
+        # One bit per flag byte, built in linear time
+        return int(flags[::-1].translate(_BIT_DIGITS) or b"0", 2)
+
+    def positions(self, bits):
+        """Ids whose bit is set, in ascending order."""
+        digits = bin(bits)[:1:-1]
+
+        # str.find skips runs of zeros in C, so sparse sets are cheap
+        found = []
+        i = digits.find("1")
+        while i != -1:
+            found.append(i)
+            i = digits.find("1", i + 1)
+        return found
+
+    def fields(self, bits):
+        """Field names whose bit is set, in id order."""
+        names = self.names
+        return [names[i] for i in self.positions(bits)]
+
+
+# Maps flag bytes 0/1 to the ASCII digits "0"/"1" for int(..., 2)
+_BIT_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
@@ -0,0 +1,83 @@
+from collections import namedtuple
+
+# Field names in AnalysisResult id order, DAX edges as (source id,
+# target id), bitsets of the directly / relationship-used fields and of
+# all used fields, and the circular dependencies of one analysis
+GraphState = namedtuple("GraphState", ["fields", "edges", "seed_bits", "used_bits", "cycles"])
+
+
+class AnalysisSnapshot:
+    """
+    Per-object content digests and intermediate results of one analysis,
+    kept to re-analyze the next version of the same report: unchanged
+    DAX expressions are not tokenized again, unchanged embedded JSON
+    strings of the layout are not parsed again, and when the model
+    keeps the same fields the dependency graph and usage are patched
+    instead of rebuilt.
+    """
+    __slots__ = (
+        "fields",
+        "references",
+        "parsed_texts",
+        "containers",
+        "graph"
+    )
+
+    def __init__(self, fields=None, references=None, parsed_texts=None, containers=None, graph=None):
+        # field -> (kind, digest of its DAX expression or "" for a plain column)
+        self.fields = fields or {}
+
+        # field -> (digest, expression_references()) of its DAX expression
+        self.references = references or {}
+
+        # embedded JSON digest -> (fields it references, visual label)
+        self.parsed_texts = parsed_texts or {}
+
+        # "page / visual" -> (kind, digest of the container's embedded JSON)
+        self.containers = containers or {}
+
+        # GraphState of the analysis, or None
+        self.graph = graph
+
+    # ---------------------------------------------
+    # Serialization
+    # ---------------------------------------------
+    def to_dict(self):
+        return {
+            "fields": {f: list(v) for f, v in self.fields.items()},
+            "references": {f: [digest, [list(r) for r in refs]] for f, (digest, refs) in self.references.items()},
+            "parsed_texts": {d: [sorted(fields), label] for d, (fields, label) in self.parsed_texts.items()},
+            "containers": {c: list(v) for c, v in self.containers.items()},
+            "graph": _graph_to_dict(self.graph) if self.graph else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            {f: tuple(v) for f, v in data["fields"].items()},
+            {f: (digest, tuple(tuple(r) for r in refs)) for f, (digest, refs) in data["references"].items()},
+            {d: (set(fields), label) for d, (fields, label) in data["parsed_texts"].items()},
+            {c: tuple(v) for c, v in data["containers"].items()},
+            _graph_from_dict(data["graph"]) if data["graph"] else None
+        )
+
+
+def _graph_to_dict(graph):
+    return {
+        "fields": graph.fields,
+        "edges": [i for edge in graph.edges for i in edge],
+        "seed_bits": format(graph.seed_bits, "x"),
+        "used_bits": format(graph.used_bits, "x"),
+        "cycles": graph.cycles
+    }
+
+
+def _graph_from_dict(data):
+    flat_edges = data["edges"]
+    return GraphState(
+        data["fields"],
+        list(zip(flat_edges[::2], flat_edges[1::2])),
+        int(data["seed_bits"], 16),
+        int(data["used_bits"], 16),
+        data["cycles"]
+    )
@@ -0,0 +1,58 @@
+def split_field(field):
+    """'Table[Name]' -> ('Table', 'Name')."""
+    table, _, name = field.partition("[")
+    return table, name[:-1] if name.endswith("]") else name
+
+
+def _normalize(text):
+    return text.lower().strip()
+
+
+class SymbolTable:
+    """
+    Hash indexes over the model's columns and measures, built once per
+    analysis so every DAX reference resolves in constant time.
+    Lookups are case-insensitive, like DAX itself.
+    """
+
+    def __init__(self, columns, measures):
+
+        # "table[column]" -> column / "table[measure]" -> measure
+        self.columns_by_ref = {}
+        self.measures_by_ref = {}
+
+        # "measure name" -> measures with that name
+        self.measures_by_name = {}
+
+        # Sorted input makes the winner of any normalized-name clash
+        # (and the order of multi-matches) independent of set order
+        # (_normalize() inlined: one call per field adds up on big models)
+        for column in sorted(columns):
+            self.columns_by_ref.setdefault(column.lower().strip(), column)
+
+        for measure in sorted(measures):
+            self.measures_by_ref.setdefault(measure.lower().strip(), measure)
+            _, name = split_field(measure)
+            self.measures_by_name.setdefault(name.lower().strip(), []).append(measure)
+
+    def resolve_qualified(self, table, name):
+        """Table[Name]: a column, or a table-qualified measure."""
+        ref = _normalize(f"{table}[{name}]")
+        field = self.columns_by_ref.get(ref) or self.measures_by_ref.get(ref)
+        return (field,) if field else ()
+
+    def resolve_bare(self, name, owner_table=None):
+        """
+        [Name]: the measure(s) with that name; otherwise, inside a
+        calculated column, a column of the owning table (row context).
+        """
+        measures = self.measures_by_name.get(_normalize(name))
+        if measures:
+            return tuple(measures)
+
+        if owner_table is not None:
+            column = self.columns_by_ref.get(_normalize(f"{owner_table}[{name}]"))
+            if column:
+                return (column,)
+
+        return ()
@@ -0,0 +1,117 @@
+# =========================
+# IMPORT LIBRARIES
+# =========================
+
+import streamlit as st
+
+from config.settings import PROFILE_TRACE_MEMORY
+from core.profiling import StageProfiler
+from services.extraction_service import read_report_layout, read_model_schema
+from services.shared_dataset_service import analyze_shared_dataset, report_rows
+from ui.components import nested_workers, run_in_background, show_field_list, show_impact, show_lineage
+
+
+# =========================
+# STREAMLIT UI CONFIG
+# =========================
+
+st.set_page_config(page_title="Shared Dataset", layout="wide")
+
+st.title("🗂️ Shared Dataset")
+
+st.write(
+    "Upload one model and the thin reports bound to it. A field counts as unused "
+    "only when no report uses it, directly or through DAX."
+)
+
+model_file = st.file_uploader("Model (PBIT, DataModelSchema or model.bim JSON)", type=["pbit", "json", "bim"])
+report_files = st.file_uploader("Reports (PBIT or PBIX)", type=["pbit", "pbix"], accept_multiple_files=True)
+
+
+# =========================
+# MAIN EXECUTION
+# =========================
+
+if model_file and report_files:
+
+    # Set by the checkbox next to the Performance panel
+    trace_memory = st.session_state.get("shared_trace_memory", PROFILE_TRACE_MEMORY)
+
+    # Kept per set of uploads (and tracing), so widget reruns skip straight to the display
+    upload_id = ":".join([model_file.file_id] + sorted(f.file_id for f in report_files) + [str(trace_memory)])
+    memo = st.session_state.get("shared")
+
+    if not memo or memo["upload_id"] != upload_id:
+        schema_raw = read_model_schema(model_file)
+        # Only Report/Layout is read from each report
+        layouts = {f.name: read_report_layout(f) for f in report_files}
+
+        result, reports = run_in_background(
+            analyze_shared_dataset, schema_raw, layouts, StageProfiler(trace_memory), nested_workers(),
+            label=f"Analyzing {len(layouts)} reports..."
+        )
+        memo = {"upload_id": upload_id, "result": result, "reports": reports}
+        st.session_state["shared"] = memo
+
+    result = memo["result"]
+    summary = result.compute_summary()
+
+    if result.dependency_cycles:
+        st.warning("⚠️ Circular DAX dependencies: " + "; ".join(" → ".join(c) for c in result.dependency_cycles))
+
+
+    # =========================
+    # DASHBOARD DISPLAY
+    # =========================
+
+    st.markdown("## 📊 Union Summary")
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Reports", len(memo["reports"]))
+    c2.metric("Unused Tables", summary["Unused Tables"])
+    c3.metric("Unused Columns", f"{summary['Unused Columns']} / {summary['Total Columns']}")
+    c4.metric("Unused Measures", f"{summary['Unused Measures']} / {summary['Total Measures']}")
+
+    st.markdown("## 📑 Per Report")
+    st.dataframe(report_rows(result, memo["reports"]), hide_index=True, width="stretch")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        show_field_list("🔴 Unused Columns", result.unused_columns, "shared_unused_columns")
+
+    with col2:
+        show_field_list("🟠 Unused Measures", result.unused_measures, "shared_unused_measures")
+
+
+    # =========================
+    # IMPACT ANALYSIS
+    # =========================
+
+    st.markdown("## 🧨 Impact of Removing")
+    show_impact(result, memo)
+
+
+    # =========================
+    # LINEAGE EXPLORER
+    # =========================
+
+    st.markdown("## 🧬 Lineage")
+    show_lineage(result, memo)
+
+
+    # =========================
+    # PERFORMANCE
+    # =========================
+
+    st.checkbox(
+        "Trace memory per stage", value=PROFILE_TRACE_MEMORY, key="shared_trace_memory",
+        help="Analyzes again with tracemalloc (several times slower) and adds each stage's peak below."
+    )
+
+    with st.expander("⏱️ Performance"):
+        st.write(f"Total: {result.profile['total_wall_s']:.3f}s")
+        if "peak_bytes" in result.profile:
+            st.write(f"Peak traced memory: {result.profile['peak_bytes'] / 1e6:.1f} MB")
+        st.dataframe(result.profile["stages"], hide_index=True, width="stretch")
+        st.json(result.profile["counters"])
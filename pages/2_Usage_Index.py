@@ -0,0 +1,79 @@
+# =========================
+# IMPORT LIBRARIES
+# =========================
+
+import time
+
+import streamlit as st
+
+from services.usage_index_service import index_stats, list_reports, search_fields
+from services.usage_index_service import field_usage, field_visuals, field_dependents
+
+
+# =========================
+# STREAMLIT UI CONFIG
+# =========================
+
+st.set_page_config(page_title="Usage Index", layout="wide")
+
+st.title("🔎 Usage Index")
+
+st.write(
+    "Every report analyzed in the app (or with `python cli.py ... --index`) is stored here. "
+    "Look up which reports use a column or measure, and how."
+)
+
+stats = index_stats()
+c1, c2 = st.columns(2)
+c1.metric("Indexed Reports", stats["Reports"])
+c2.metric("Distinct Fields", stats["Distinct Fields"])
+
+with st.expander("📚 Indexed reports"):
+    st.dataframe(list_reports(), hide_index=True, width="stretch")
+
+
+# =========================
+# FIELD LOOKUP
+# =========================
+
+query = st.text_input("Field", placeholder="Sales[Margin %], or part of a table / field name")
+
+if query:
+    matches = search_fields(query)
+
+    if not matches:
+        st.info("No indexed report has a field matching this.")
+        st.stop()
+
+    names = [name for name, _ in matches]
+    counts = dict(matches)
+    field = st.selectbox(
+        "Matching fields",
+        names,
+        format_func=lambda name: f"{name}  (in {counts[name]} report{'s' if counts[name] != 1 else ''})"
+    )
+
+    start = time.perf_counter()
+    usage = field_usage(field)
+    visuals = field_visuals(field)
+    dependents = field_dependents(field)
+    elapsed = time.perf_counter() - start
+
+    used = sum(1 for row in usage if row["Usage"] != "unused")
+    st.caption(f"Used in {used} of {len(usage)} reports that have it · looked up in {elapsed * 1000:.1f} ms")
+
+    st.markdown("### 📑 Reports")
+    st.dataframe(usage, hide_index=True, width="stretch")
+
+    col1, col2 = st.columns(2)
+
+    for column, title, rows in (
+        (col1, "📊 Visuals and Filters", visuals),
+        (col2, "🧮 Referenced By", dependents)
+    ):
+        with column:
+            st.markdown(f"### {title} ({len(rows)})")
+            if rows:
+                st.dataframe(rows, hide_index=True, width="stretch")
+            else:
+                st.caption("None")
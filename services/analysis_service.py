@@ -0,0 +1,256 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures.process import BrokenProcessPool
+
+from config.settings import LAYOUT_STREAM_MIN_BYTES, LAYOUT_OVERLAP_MIN_BYTES
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+from core.json_loader import loads_json
+from core.process_pool import run_with_pool
+from core.profiling import StageProfiler
+from models.analysis_model import field_order
+from models.symbol_table import SymbolTable
+from services.dependency_graph import DependencyGraph
+from services.dependency_service import build_dependency_graph, update_dependency_graph
+from services.layout_service import scan_layout, scan_layout_stream
+from services.metadata_service import collect_metadata
+from services.schema_service import load_schema_bytes
+from services.usage_service import compute_usage, update_usage
+
+
+# =========================
+# STAGE RESULTS
+# =========================
+
+# Schema branch: collect_metadata() dict + DependencyGraph of the DAX;
+# changed_fields lists the fields whose edges were replaced in an
+# earlier version's graph, or is None for a graph built from scratch
+ModelStage = namedtuple("ModelStage", ["metadata", "dependency_graph", "changed_fields"])
+
+# Layout branch: fields referenced by visuals, pages and report filters,
+# plus (page, visual, fields) per container for impact analysis
+LayoutStage = namedtuple("LayoutStage", ["used_fields", "visuals", "visual_usage"])
+
+
+# =========================
+# SCHEMA BRANCH (STEPS 2-4, 7)
+# =========================
+
+def model_stage(schema_raw, profiler, references=None, previous=None):
+    """
+    DataModelSchema bytes -> tables, columns, measures, relationships and
+    DAX graph. `references` is passed to build_dependency_graph().
+
+    `previous` (a GraphState) is the graph of an earlier version: if
+    the model still has exactly its fields, that graph is updated with
+    update_dependency_graph() instead of being built again.
+    """
+
+    with profiler.stage("load_schema"):
+        schema_json = load_schema_bytes(schema_raw)
+
+    profiler.count("schema_bytes", len(schema_raw))
+
+    # System date tables and their relationships are skipped here
+    with profiler.stage("collect_metadata"):
+        metadata = collect_metadata(schema_json)
+
+    profiler.count("tables", len(metadata["tables"]))
+    profiler.count("columns", len(metadata["columns"]))
+    profiler.count("measures", len(metadata["measures"]))
+    profiler.count("expressions", len(metadata["expressions"]))
+
+    # Symbol table is built once; each reference resolves by hash lookup
+    with profiler.stage("build_graph"):
+        columns = metadata["columns"]
+        measures = metadata["measures"]
+
+        if previous is not None and references is not None and field_order(columns, measures) == previous.fields:
+            dependency_graph = DependencyGraph.from_edges(previous.fields, previous.edges)
+            changed_fields = update_dependency_graph(
+                dependency_graph,
+                metadata["expressions"],
+                references,
+                lambda: SymbolTable(columns, measures)
+            )
+        else:
+            symbols = SymbolTable(columns, measures)
+            dependency_graph = build_dependency_graph(metadata["expressions"], symbols, references)
+            changed_fields = None
+
+    profiler.count("references", dependency_graph.reference_count)
+    profiler.count("graph_edges", dependency_graph.edge_count())
+
+    return ModelStage(metadata, dependency_graph, changed_fields)
+
+
+# =========================
+# LAYOUT BRANCH (STEP 5)
+# =========================
+
+def layout_stage(layout_raw, profiler, parallel=True, stream=None, parsed_texts=None, fingerprints=None):
+    """
+    Report/Layout bytes -> fields used by the report. Huge layouts
+    (stream=None: LAYOUT_STREAM_MIN_BYTES and up) are streamed one
+    visual at a time instead of being loaded as one document.
+    `parsed_texts` and `fingerprints` are passed to the scanner.
+    """
+    if stream is None:
+        stream = len(layout_raw) >= LAYOUT_STREAM_MIN_BYTES
+
+    profiler.count("layout_bytes", len(layout_raw))
+    visual_usage = []
+
+    if stream:
+        with profiler.stage("stream_layout"):
+            used_fields, visuals = scan_layout_stream(
+                layout_raw,
+                visual_usage=visual_usage,
+                parsed_texts=parsed_texts,
+                fingerprints=fingerprints
+            )
+
+        profiler.count("visuals", visuals)
+        return LayoutStage(used_fields, visuals, visual_usage)
+
+    with profiler.stage("load_layout"):
+        layout_json = loads_json(layout_raw, LAYOUT_FILE_PATH)
+
+    visuals = sum(len(s.get("visualContainers", [])) for s in layout_json.get("sections", []))
+    profiler.count("visuals", visuals)
+
+    # Filters, queries, configs and data transforms; each distinct
+    # string is parsed once
+    with profiler.stage("scan_layout"):
+        used_fields = scan_layout(
+            layout_json,
+            parallel=parallel,
+            visual_usage=visual_usage,
+            parsed_texts=parsed_texts,
+            fingerprints=fingerprints
+        )
+
+    return LayoutStage(used_fields, visuals, visual_usage)
+
+
+# =========================
+# USAGE (STEPS 6, 8, 9)
+# =========================
+
+def usage_stage(model, layout, profiler, previous=None):
+    """
+    Marks direct and relationship usage, then follows the DAX graph.
+    A graph updated from `previous` (see model_stage()) updates its
+    usage the same way.
+    """
+
+    with profiler.stage("propagate"):
+        if model.changed_fields is not None:
+            return update_usage(
+                previous,
+                model.changed_fields,
+                layout.used_fields,
+                model.metadata,
+                model.dependency_graph,
+                model.metadata["relationship_columns"],
+                layout.visual_usage
+            )
+
+        return compute_usage(
+            layout.used_fields,
+            model.metadata,
+            model.dependency_graph,
+            model.metadata["relationship_columns"],
+            layout.visual_usage
+        )
+
+
+# =========================
+# BOTH BRANCHES
+# =========================
+
+def run_branches(members, profiler, overlap=True, parallel=True, stream=None,
+                 references=None, previous=None, parsed_texts=None, fingerprints=None):
+    """
+    (ModelStage, LayoutStage) of the DataModelSchema / Report/Layout
+    bytes; the other arguments are passed to model_stage() and
+    layout_stage().
+
+    The branches do not depend on each other. With overlap=True, a
+    layout of LAYOUT_OVERLAP_MIN_BYTES or more is scanned in a process
+    of its own while the model branch runs here: both are pure Python,
+    so threads would only take turns on the GIL. Its stage timings are
+    merged into `profiler`.
+    """
+    schema_raw = members[SCHEMA_FILE_NAME]
+    layout_raw = members[LAYOUT_FILE_PATH]
+
+    def build_model():
+        return model_stage(schema_raw, profiler, references, previous)
+
+    # A single core would only switch between the two processes
+    if overlap and len(layout_raw) >= LAYOUT_OVERLAP_MIN_BYTES and (os.cpu_count() or 1) > 1:
+        layout_args = (layout_raw, profiler.trace_memory, parallel, stream, parsed_texts, fingerprints is not None)
+        branches = run_with_pool(1, lambda pool: _overlap_in(pool, build_model, layout_args))
+
+        if branches is not None:
+            model, scanned = branches
+            if scanned is not None:
+                layout, texts, found, profile, end = scanned
+                profiler.merge(profile, end=end)
+                if parsed_texts is not None:
+                    parsed_texts.clear()
+                    parsed_texts.update(texts)
+                if fingerprints is not None:
+                    fingerprints.extend(found)
+                return model, layout
+
+            # The layout process died: scanned here instead
+            return model, layout_stage(layout_raw, profiler, parallel, stream, parsed_texts, fingerprints)
+
+    model = build_model()
+    layout = layout_stage(layout_raw, profiler, parallel, stream, parsed_texts, fingerprints)
+    return model, layout
+
+
+def _overlap_in(pool, build_model, layout_args):
+    future = pool.submit(_scan_in_process, *layout_args)
+    model = build_model()
+    try:
+        return model, future.result()
+    except BrokenProcessPool:
+        return model, None
+
+
+def _scan_in_process(layout_raw, trace_memory, parallel, stream, parsed_texts, want_fingerprints):
+    profiler = StageProfiler(trace_memory)
+    fingerprints = [] if want_fingerprints else None
+    layout = layout_stage(layout_raw, profiler, parallel, stream, parsed_texts, fingerprints)
+
+    # LayoutStage holds sets and tuples only: cheap to send back
+    return layout, parsed_texts, fingerprints, profiler.to_dict(), time.perf_counter()
+
+
+# =========================
+# ANALYSIS PIPELINE (STEPS 2-9)
+# =========================
+
+def analyze_members(members, profiler=None, parallel=True, stream=None, overlap=None):
+    """
+    Runs the full analysis on the DataModelSchema / Report/Layout bytes
+    and returns the final categorization as an AnalysisResult, with the
+    per-stage timings and size counters in result.profile.
+
+    parallel=False keeps the layout strings out of a process pool (the
+    caller already runs one analysis per process); overlap (default:
+    same as parallel) lets the layout branch run in one process beside
+    the model branch, see run_branches().
+    """
+    profiler = profiler or StageProfiler()
+    overlap = parallel if overlap is None else overlap
+
+    model, layout = run_branches(members, profiler, overlap, parallel, stream)
+
+    result = usage_stage(model, layout, profiler)
+    result.profile = profiler.to_dict()
+    return result
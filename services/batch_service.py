@@ -0,0 +1,195 @@
+import glob
+import os
+import time
+from concurrent.futures import as_completed
+
+from config.settings import PROFILE_TRACE_MEMORY
+from core.constants import SCHEMA_FILE_NAME, PBIT_EXTENSION, PBIX_EXTENSION
+from core.file_manager import read_archive_members
+from core.process_pool import RetryingPool
+from core.profiling import StageProfiler
+from services.analysis_service import analyze_members
+from services.cache_service import analysis_key, dataset_name, store_schema, load_cached_schema
+from services.extraction_service import is_pbix, read_report_layout, read_model_schema, pbix_members
+from services.shared_dataset_service import analyze_shared_dataset, report_rows
+from services.usage_index_service import index_report
+
+
+# ---------------------------------------------
+# Input discovery
+# ---------------------------------------------
+def find_report_files(patterns):
+    """
+    Expands directories (recursively) and glob patterns into a sorted,
+    de-duplicated list of .pbit and .pbix paths.
+    """
+    paths = set()
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found = []
+            for extension in (PBIT_EXTENSION, PBIX_EXTENSION):
+                found += glob.glob(os.path.join(pattern, "**", "*" + extension), recursive=True)
+        else:
+            found = glob.glob(pattern, recursive=True)
+
+        for path in found:
+            if os.path.isfile(path):
+                paths.add(os.path.abspath(path))
+
+    return sorted(paths)
+
+
+# ---------------------------------------------
+# Single file (runs inside a worker process)
+# ---------------------------------------------
+def analyze_file(path, schema_path=None, index=False, trace_memory=PROFILE_TRACE_MEMORY):
+    """
+    Analyzes one .pbit or .pbix with the same pipeline as the UI and
+    returns a JSON-serializable record, including the per-stage profile.
+    A .pbix only contributes its Report/Layout; the model comes from
+    `schema_path` (.pbit or model JSON) or from the schema cached when
+    a .pbit with the same file name was analyzed. With index=True the
+    result is also stored in the usage index under `path`;
+    trace_memory=True adds each stage's tracemalloc peak to the profile.
+    Failures are returned, not raised, so one bad template never
+    aborts the batch.
+    """
+    start = time.perf_counter()
+    profiler = StageProfiler(trace_memory)
+    schema_source = path
+
+    try:
+        with profiler.stage("read_archive"):
+            if is_pbix(path):
+                layout_raw = read_report_layout(path)
+
+                if schema_path:
+                    schema_raw = read_model_schema(schema_path)
+                    schema_source = schema_path
+                else:
+                    schema_raw = load_cached_schema(dataset_name(path))
+                    schema_source = "cache:" + dataset_name(path)
+
+                if schema_raw is None:
+                    raise LookupError(
+                        "no model schema for this .pbix: pass --schema, "
+                        "or analyze the .pbit with the same file name first"
+                    )
+                members = pbix_members(layout_raw, schema_raw)
+            else:
+                members = read_archive_members(path)
+
+        if not is_pbix(path):
+            # Kept so .pbix reports of the same model can be analyzed
+            # later (a no-op when the same schema is already kept)
+            with profiler.stage("schema_store"):
+                store_schema(dataset_name(path), members[SCHEMA_FILE_NAME])
+
+        # One analysis per process already: no nested layout pool
+        result = analyze_members(members, profiler, parallel=False)
+
+        if index:
+            with profiler.stage("index_store"):
+                index_report(path, result, analysis_key(members))
+            result.profile = profiler.to_dict()
+
+    except Exception as e:
+        return {
+            "file": path,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": round(time.perf_counter() - start, 4)
+        }
+
+    return {
+        "file": path,
+        "status": "ok",
+        "schema": schema_source,
+        "seconds": round(time.perf_counter() - start, 4),
+        "summary": result.compute_summary(),
+        "unused_columns": sorted(result.unused_columns),
+        "unused_measures": sorted(result.unused_measures),
+        "dependency_cycles": result.dependency_cycles,
+        "profile": result.profile
+    }
+
+
+# ---------------------------------------------
+# Batch runner
+# ---------------------------------------------
+def run_batch(paths, workers=None, schema_path=None, index=False, trace_memory=PROFILE_TRACE_MEMORY):
+    """
+    Yields one record per file, in completion order, while the rest
+    are still being analyzed in a process pool. Templates run before
+    .pbix reports, so a report can pair with a schema cached by the
+    same batch.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+
+    pbit_paths = [p for p in paths if not is_pbix(p)]
+    pbix_paths = [p for p in paths if is_pbix(p)]
+
+    if workers == 1:
+        for path in pbit_paths + pbix_paths:
+            yield analyze_file(path, schema_path, index, trace_memory)
+        return
+
+    # A worker that dies only costs the runs it broke one retry
+    pool = RetryingPool(workers)
+    try:
+        for phase in (pbit_paths, pbix_paths):
+            yield from _run_phase(pool, phase, schema_path, index, trace_memory)
+    finally:
+        pool.shutdown()
+
+
+def _run_phase(pool, paths, schema_path, index, trace_memory):
+    """Yields one record per path in completion order."""
+    futures = {pool.submit(analyze_file, path, schema_path, index, trace_memory): path for path in paths}
+
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as e:
+            yield {"file": futures[future], "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+# ---------------------------------------------
+# Shared dataset (many reports, one model)
+# ---------------------------------------------
+def analyze_shared(paths, schema_path, workers=None, trace_memory=PROFILE_TRACE_MEMORY):
+    """
+    Analyzes every report in `paths` (.pbit or .pbix, Report/Layout
+    only) against the model in `schema_path` as one shared dataset and
+    returns one record with the union usage and a row per report.
+    """
+    start = time.perf_counter()
+    profiler = StageProfiler(trace_memory)
+
+    try:
+        with profiler.stage("read_archive"):
+            schema_raw = read_model_schema(schema_path)
+            layouts = {path: read_report_layout(path) for path in paths}
+
+        result, reports = analyze_shared_dataset(schema_raw, layouts, profiler, workers)
+
+    except Exception as e:
+        return {
+            "schema": schema_path,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": round(time.perf_counter() - start, 4)
+        }
+
+    return {
+        "schema": schema_path,
+        "status": "ok",
+        "seconds": round(time.perf_counter() - start, 4),
+        "summary": result.compute_summary(),
+        "unused_columns": sorted(result.unused_columns),
+        "unused_measures": sorted(result.unused_measures),
+        "dependency_cycles": result.dependency_cycles,
+        "reports": report_rows(result, reports),
+        "profile": result.profile
+    }
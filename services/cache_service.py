@@ -0,0 +1,248 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from config.settings import CACHE_FOLDER, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, SCHEMA_CACHE_FOLDER, SNAPSHOT_CACHE_FOLDER
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+from models.analysis_model import AnalysisResult
+from models.snapshot_model import AnalysisSnapshot
+
+# Bump when the stored result layout or the analysis rules change,
+# so entries computed by older code are ignored
+CACHE_FORMAT_VERSION = 9
+
+ENTRY_SUFFIX = ".json.gz"
+SCHEMA_SUFFIX = ".schema.gz"
+SNAPSHOT_SUFFIX = ".snapshot.gz"
+STALE_TMP_SECONDS = 3600
+
+
+# ---------------------------------------------
+# Cache key
+# ---------------------------------------------
+def analysis_key(members):
+    """
+    SHA-256 over the DataModelSchema and Report/Layout bytes, so a
+    re-zipped or re-saved template with the same model and report
+    still hits the same entry.
+    """
+    digest = hashlib.sha256(f"v{CACHE_FORMAT_VERSION}".encode("ascii"))
+
+    for name in (SCHEMA_FILE_NAME, LAYOUT_FILE_PATH):
+        data = members[name]
+        digest.update(name.encode("utf-8"))
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+
+    return digest.hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_FOLDER, key + ENTRY_SUFFIX)
+
+
+# ---------------------------------------------
+# Public functions
+# ---------------------------------------------
+def load_cached_analysis(key):
+
+    path = _entry_path(key)
+
+    try:
+        with gzip.open(path, "rb") as f:
+            payload = json.loads(f.read())
+
+        # LRU: mtime is the last access time used by eviction
+        os.utime(path)
+    except (OSError, EOFError, ValueError):
+        # Missing, evicted by another process, or unreadable
+        return None
+
+    return AnalysisResult.from_dict(payload)
+
+
+def store_analysis(key, result):
+
+    # Field names once plus hex bitsets per category
+    payload = json.dumps(result.to_dict(), separators=(",", ":"))
+    data = gzip.compress(payload.encode("utf-8"), mtime=0)
+
+    if write_atomic(_entry_path(key), data):
+        _evict()
+
+
+# ---------------------------------------------
+# Model schemas (pair .pbix reports with a .pbit model)
+# ---------------------------------------------
+def dataset_name(file_name):
+    """Schemas are stored under the template's file name without extension."""
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def store_schema(dataset, schema_raw):
+    """
+    Keeps the raw DataModelSchema bytes of a .pbit for later .pbix runs.
+    The same schema stored again (re-upload, cache hit, batch re-run) is
+    only marked as recently used: no compression, no eviction pass.
+    """
+    path = _dataset_path(SCHEMA_CACHE_FOLDER, dataset, SCHEMA_SUFFIX)
+
+    if _stored_bytes_equal(path, schema_raw):
+        os.utime(path)
+        return
+
+    data = gzip.compress(schema_raw, compresslevel=6, mtime=0)
+    if write_atomic(path, data):
+        _evict()
+
+
+def load_cached_schema(dataset):
+    path = _dataset_path(SCHEMA_CACHE_FOLDER, dataset, SCHEMA_SUFFIX)
+    try:
+        with gzip.open(path, "rb") as f:
+            schema_raw = f.read()
+        os.utime(path)
+    except (OSError, EOFError):
+        return None
+    return schema_raw
+
+
+def list_cached_schemas():
+    try:
+        names = os.listdir(SCHEMA_CACHE_FOLDER)
+    except OSError:
+        return []
+    return sorted(n[:-len(SCHEMA_SUFFIX)] for n in names if n.endswith(SCHEMA_SUFFIX))
+
+
+# ---------------------------------------------
+# Snapshots (re-analysis of a new report version)
+# ---------------------------------------------
+def store_snapshot(key, snapshot):
+    """
+    Keeps the per-object digests of the analysis stored under `key`
+    (analysis_key() of its members). Keyed by content, not by file name,
+    so sessions uploading files of the same name never see each other's
+    versions.
+    """
+    payload = json.dumps({"version": CACHE_FORMAT_VERSION, "snapshot": snapshot.to_dict()}, separators=(",", ":"))
+    # Written for every new version: fast compression over small size
+    data = gzip.compress(payload.encode("utf-8"), compresslevel=1, mtime=0)
+    if write_atomic(_dataset_path(SNAPSHOT_CACHE_FOLDER, key, SNAPSHOT_SUFFIX), data):
+        _evict()
+
+
+def load_snapshot(key):
+    path = _dataset_path(SNAPSHOT_CACHE_FOLDER, key, SNAPSHOT_SUFFIX)
+    try:
+        with gzip.open(path, "rb") as f:
+            payload = json.loads(f.read())
+        os.utime(path)
+    except (OSError, EOFError, ValueError):
+        return None
+
+    # Taken by older code: its intermediate results may not match
+    if payload.get("version") != CACHE_FORMAT_VERSION:
+        return None
+
+    return AnalysisSnapshot.from_dict(payload["snapshot"])
+
+
+def _stored_bytes_equal(path, raw):
+    try:
+        with open(path, "rb") as f:
+            # The gzip trailer ends with the uncompressed size (mod 2**32):
+            # a changed schema usually differs there, without decompressing
+            f.seek(-4, os.SEEK_END)
+            if int.from_bytes(f.read(4), "little") != len(raw) & 0xFFFFFFFF:
+                return False
+            f.seek(0)
+            with gzip.GzipFile(fileobj=f) as stored:
+                return stored.read() == raw
+    except (OSError, EOFError):
+        return False
+
+
+def _dataset_path(folder, name, suffix):
+    # One flat folder: path separators in a name must not escape it
+    safe_name = name.replace(os.sep, "_").replace("/", "_")
+    return os.path.join(folder, safe_name + suffix)
+
+
+# ---------------------------------------------
+# Atomic write (also used by the watch service)
+# ---------------------------------------------
+def write_atomic(path, data):
+    """
+    Writes to a private temp file and renames it, so concurrent readers
+    and writers in other processes never see a partial entry.
+    """
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except OSError:
+        _remove(tmp_path)
+        return False
+
+    return True
+
+
+# ---------------------------------------------
+# Internal eviction (LRU, bounded by count and size)
+# ---------------------------------------------
+# Every kind of file kept, sharing one budget
+_EVICTED_FILES = (
+    (CACHE_FOLDER, ENTRY_SUFFIX),
+    (SCHEMA_CACHE_FOLDER, SCHEMA_SUFFIX),
+    (SNAPSHOT_CACHE_FOLDER, SNAPSHOT_SUFFIX)
+)
+
+
+def _evict():
+
+    entries = []
+    now = time.time()
+
+    for folder, suffix in _EVICTED_FILES:
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            continue
+
+        for name in names:
+            path = os.path.join(folder, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            if name.endswith(suffix):
+                entries.append((stat.st_mtime, stat.st_size, path))
+            elif name.endswith(".tmp") and now - stat.st_mtime > STALE_TMP_SECONDS:
+                # Left behind by a writer that crashed mid-store
+                _remove(path)
+
+    entries.sort(reverse=True)
+
+    total_bytes = 0
+    for index, (_, size, path) in enumerate(entries):
+        total_bytes += size
+        if index >= CACHE_MAX_ENTRIES or total_bytes > CACHE_MAX_BYTES:
+            _remove(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        # Already removed by another process
+        pass
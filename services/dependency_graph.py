@@ -0,0 +1,230 @@
+from collections import deque
+
+
+class DependencyGraph:
+    """
+    Directed graph of model fields (measures and columns).
+    An edge source -> target means "source's DAX references target".
+
+    Nodes get dense integer ids; forward and reverse adjacency are
+    kept as lists of id lists, so closures are plain BFS worklists that
+    run in O(nodes + edges) whatever the depth of the measure chains.
+    """
+
+    def __init__(self):
+        self.node_ids = {}
+        self.names = []
+        self.forward = []
+        self.reverse = []
+
+        # DAX references seen while building (before de-duplication)
+        self.reference_count = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.node_ids
+
+    # ---------------------------------------------
+    # Construction
+    # ---------------------------------------------
+    def add_node(self, name):
+        node_id = self.node_ids.get(name)
+        if node_id is None:
+            node_id = len(self.names)
+            self.node_ids[name] = node_id
+            self.names.append(name)
+            self.forward.append([])
+            self.reverse.append([])
+        return node_id
+
+    def add_edge(self, source, target):
+        source_id = self.add_node(source)
+        target_id = self.add_node(target)
+        self.forward[source_id].append(target_id)
+        self.reverse[target_id].append(source_id)
+
+    @classmethod
+    def from_edges(cls, names, edges):
+        """Graph over `names` (node id = position) with (source id, target id) edges."""
+        graph = cls()
+        graph.names = list(names)
+        graph.node_ids = {name: node_id for node_id, name in enumerate(graph.names)}
+        graph.forward = [[] for _ in graph.names]
+        graph.reverse = [[] for _ in graph.names]
+
+        for source_id, target_id in edges:
+            graph.forward[source_id].append(target_id)
+            graph.reverse[target_id].append(source_id)
+
+        return graph
+
+    def remove_dependencies(self, name):
+        """Drops every edge leaving `name` (before its expression is resolved again)."""
+        node_id = self.node_ids.get(name)
+        if node_id is None:
+            return
+
+        for target_id in self.forward[node_id]:
+            self.reverse[target_id].remove(node_id)
+        self.forward[node_id] = []
+
+    def edges(self):
+        for source_id, targets in enumerate(self.forward):
+            for target_id in targets:
+                yield self.names[source_id], self.names[target_id]
+
+    def edge_count(self):
+        return sum(len(targets) for targets in self.forward)
+
+    # ---------------------------------------------
+    # Queries
+    # ---------------------------------------------
+    def dependencies(self, name):
+        """Fields referenced directly by `name`."""
+        return self._neighbours(name, self.forward)
+
+    def dependents(self, name):
+        """Fields whose expressions reference `name` directly."""
+        return self._neighbours(name, self.reverse)
+
+    def closure(self, names):
+        """`names` plus everything they depend on, transitively."""
+        return self._bfs(names, self.forward)
+
+    def reverse_closure(self, names):
+        """`names` plus everything that depends on them, transitively."""
+        return self._bfs(names, self.reverse)
+
+    def closure_ids(self, node_ids):
+        """closure() over node ids: the set of ids reachable from `node_ids`."""
+        return self._walk(node_ids, self.forward)
+
+    def find_cycles(self):
+        """
+        Returns each circular dependency as a list of field names
+        (strongly connected components with more than one node, or a
+        node referencing itself). O(nodes + edges).
+        """
+        return _cycles(self.forward, self.names)
+
+    def cycles_among(self, names):
+        """find_cycles() of the subgraph made of `names` and the edges between them."""
+        members = [self.node_ids[name] for name in names if name in self.node_ids]
+        local = {node_id: i for i, node_id in enumerate(members)}
+        adjacency = [[local[t] for t in self.forward[node_id] if t in local] for node_id in members]
+        return _cycles(adjacency, [self.names[node_id] for node_id in members])
+
+    def cycles_through(self, names):
+        """
+        find_cycles() restricted to the cycles that contain one of
+        `names`: each is what `name` reaches and is reached from.
+        Costs the two closures of every name, not the whole graph.
+        """
+        cycles = []
+        found = set()
+
+        for name in names:
+            node_id = self.node_ids.get(name)
+            if node_id is None or name in found:
+                continue
+
+            component = self.closure([name]) & self.reverse_closure([name])
+            if len(component) > 1 or node_id in self.forward[node_id]:
+                cycles.append(sorted(component))
+                found.update(component)
+
+        return sorted(cycles)
+
+    # ---------------------------------------------
+    # Internal helpers
+    # ---------------------------------------------
+    def _neighbours(self, name, adjacency):
+        node_id = self.node_ids.get(name)
+        if node_id is None:
+            return set()
+        return {self.names[n] for n in adjacency[node_id]}
+
+    def _bfs(self, names, adjacency):
+        result = set(names)
+        node_ids = self.node_ids
+        seen = self._walk((node_ids[name] for name in result if name in node_ids), adjacency)
+        result.update(self.names[n] for n in seen)
+        return result
+
+    def _walk(self, node_ids, adjacency):
+        seen = set(node_ids)
+        queue = deque(seen)
+
+        while queue:
+            for target in adjacency[queue.popleft()]:
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+
+        return seen
+
+
+def _cycles(adjacency, names):
+    return sorted(
+        sorted(names[m] for m in component)
+        for component in strongly_connected_components(adjacency)
+        if len(component) > 1 or component[0] in adjacency[component[0]]
+    )
+
+
+def strongly_connected_components(adjacency):
+    """
+    Iterative Tarjan over adjacency lists of node ids. A component is
+    emitted only after every component reachable from it.
+    """
+    count = len(adjacency)
+    index = [None] * count
+    lowlink = [0] * count
+    on_stack = [False] * count
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(count):
+        if index[root] is not None:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            node, edge_pos = work.pop()
+
+            if edge_pos == 0:
+                index[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+
+            targets = adjacency[node]
+            while edge_pos < len(targets):
+                target = targets[edge_pos]
+                edge_pos += 1
+                if index[target] is None:
+                    # Resume `node` after `target` is finished
+                    work.append((node, edge_pos))
+                    work.append((target, 0))
+                    break
+                if on_stack[target]:
+                    lowlink[node] = min(lowlink[node], index[target])
+            else:
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    return components
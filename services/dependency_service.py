@@ -1,22 +1,98 @@
-import re
+import hashlib
 
-def parse_dax_dependencies(dax_expressions):
+from core.dax_lexer import dax_references, COLUMN_REF, MEASURE_REF
+from models.symbol_table import split_field
+from services.dependency_graph import DependencyGraph
 
-    used_fields = set()
-    pattern = r"([A-Za-z0-9_ ]+)\[([A-Za-z0-9_ ]+)\]"
 
-    for dax in dax_expressions:
+def expression_references(expression):
+    """(kind, table, name) of every column / measure reference in one DAX expression."""
+    return tuple(ref for ref in dax_references(expression) if ref[0] in (COLUMN_REF, MEASURE_REF))
 
-        if isinstance(dax, list):
-            dax = " ".join(dax)
 
-        if not isinstance(dax, str):
-            continue
+def expression_digest(expression):
+    if isinstance(expression, list):
+        # Multi-line expressions are stored as a list of lines
+        expression = "\n".join(expression)
+    return hashlib.blake2b(str(expression).encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
 
-        matches = re.findall(pattern, dax)
 
-        for table, column in matches:
-            used_fields.add(f"{table.strip()}[{column.strip()}]")
+def build_dependency_graph(expressions, symbols, references=None):
+    """
+    expressions: {field: DAX expression} of measures and calculated columns.
+    Returns a DependencyGraph with an edge for every model field an
+    expression references; references resolve through the SymbolTable
+    hash indexes.
 
-    return used_fields
+    `references` ({field: (expression_digest(), expression_references())})
+    may hold the tokenized expressions of an earlier version: only
+    expressions whose digest differs are tokenized, and their entries
+    are replaced.
+    """
+    graph = DependencyGraph()
 
+    for obj_name, expr in expressions.items():
+
+        if references is None:
+            refs = expression_references(expr)
+        else:
+            digest = expression_digest(expr)
+            entry = references.get(obj_name)
+            if entry is None or entry[0] != digest:
+                entry = references[obj_name] = (digest, expression_references(expr))
+            refs = entry[1]
+
+        graph.reference_count += len(refs)
+
+        graph.add_node(obj_name)
+        for dep in _resolve(obj_name, refs, symbols):
+            graph.add_edge(obj_name, dep)
+
+    return graph
+
+
+def update_dependency_graph(graph, expressions, references, symbols_factory):
+    """
+    Brings a DependencyGraph built for an earlier version of the same
+    fields up to date with `expressions`. `references` holds the
+    earlier version's entries (see build_dependency_graph()): only
+    expressions whose digest differs, and expressions that are gone,
+    get their edges replaced. The SymbolTable is built by calling
+    `symbols_factory` only if something changed.
+
+    Returns the fields whose edges were replaced.
+    """
+    changed = [field for field in references if field not in expressions]
+
+    for obj_name, expr in expressions.items():
+        digest = expression_digest(expr)
+        entry = references.get(obj_name)
+        if entry is None or entry[0] != digest:
+            references[obj_name] = (digest, expression_references(expr))
+            changed.append(obj_name)
+
+    graph.reference_count = sum(len(references[field][1]) for field in expressions)
+
+    if changed:
+        symbols = symbols_factory()
+        for obj_name in changed:
+            graph.remove_dependencies(obj_name)
+            if obj_name in expressions:
+                for dep in _resolve(obj_name, references[obj_name][1], symbols):
+                    graph.add_edge(obj_name, dep)
+
+    return changed
+
+
+def _resolve(obj_name, refs, symbols):
+    """Sorted model fields the references of `obj_name`'s expression point to."""
+    owner_table, _ = split_field(obj_name)
+    deps = set()
+
+    for kind, table, name in refs:
+        if kind == COLUMN_REF:
+            deps.update(symbols.resolve_qualified(table, name))
+        else:
+            deps.update(symbols.resolve_bare(name, owner_table))
+
+    return sorted(deps)
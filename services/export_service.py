@@ -1,20 +1,69 @@
+import io
 
-import pandas as pd
-import os
+from models.symbol_table import split_field
 
-def generate_excel(base_path, usage_result):
+def generate_excel(result):
+    """
+    Streams the analysis into an in-memory .xlsx and returns its bytes.
+    xlsxwriter's constant_memory mode flushes every row as it is
+    written, so memory stays flat however large the model is.
 
-    rows = []
+    Sheets: Columns, Measures, Dependencies (edge list), Summary.
+    """
+    # Imported on first export: most runs never build a workbook
+    import xlsxwriter
 
-    for col in usage_result["used_columns"]:
-        rows.append({"Field": col, "Used": True})
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    header = workbook.add_format({"bold": True})
 
-    for col in usage_result["unused_columns"]:
-        rows.append({"Field": col, "Used": False})
+    statuses = _field_statuses(result)
+    names = result.fields.names
 
-    df = pd.DataFrame(rows)
+    # Columns
+    sheet = _add_sheet(workbook, "Columns", ["Field", "Table", "Column", "Status"], header, [45, 30, 30, 22])
+    for row, field_id in enumerate(result.fields.positions(result.column_bits), start=1):
+        field = names[field_id]
+        sheet.write_row(row, 0, (field, *split_field(field), statuses[field_id]))
 
-    path = os.path.join(base_path, "PowerBI_Model_Analysis.xlsx")
-    df.to_excel(path, index=False)
+    # Measures
+    sheet = _add_sheet(workbook, "Measures", ["Field", "Table", "Measure", "Status"], header, [45, 30, 30, 22])
+    for row, field_id in enumerate(result.fields.positions(result.measure_bits), start=1):
+        field = names[field_id]
+        sheet.write_row(row, 0, (field, *split_field(field), statuses[field_id]))
 
-    return path
+    # Dependency edge list: Source references Target
+    sheet = _add_sheet(workbook, "Dependencies", ["Source", "Source Status", "Target", "Target Status"], header, [45, 22, 45, 22])
+    for row, (source_id, target_id) in enumerate(sorted(result.dependency_edges), start=1):
+        sheet.write_row(row, 0, (names[source_id], statuses[source_id], names[target_id], statuses[target_id]))
+
+    # Summary
+    sheet = _add_sheet(workbook, "Summary", ["Metric", "Value"], header, [30, 12])
+    for row, (metric, value) in enumerate(result.compute_summary().items(), start=1):
+        sheet.write_row(row, 0, (metric, value))
+
+    workbook.close()
+    return output.getvalue()
+
+
+def _add_sheet(workbook, name, headers, header_format, widths):
+    sheet = workbook.add_worksheet(name)
+    for col, width in enumerate(widths):
+        sheet.set_column(col, col, width)
+    sheet.write_row(0, 0, headers, header_format)
+    return sheet
+
+
+def _field_statuses(result):
+    """Status per field id; later categories take precedence."""
+    statuses = ["Unused"] * len(result.fields)
+
+    for bits, status in (
+        (result.indirect_column_bits | result.indirect_measure_bits, "Indirectly Used"),
+        (result.relationship_bits, "Used in Relationship"),
+        (result.direct_bits, "Directly Used")
+    ):
+        for field_id in result.fields.positions(bits):
+            statuses[field_id] = status
+
+    return statuses
@@ -1,7 +1,38 @@
-from core.file_manager import prepare_workspace, extract_zip
+import zipfile
 
-def extract_uploaded_pbit(uploaded_file):
-    base_path = prepare_workspace()
-    extract_zip(uploaded_file, base_path)
-    return base_path
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH, PBIX_EXTENSION
+from core.file_manager import read_archive_members
 
+
+def is_pbix(file_name):
+    return file_name.lower().endswith(PBIX_EXTENSION)
+
+
+def read_report_layout(source):
+    """
+    Report/Layout bytes of a .pbix (or .pbit). Only the ZIP central
+    directory and that one entry are read; the DataModel blob of a
+    .pbix is never touched.
+    """
+    return read_archive_members(source, (LAYOUT_FILE_PATH,))[LAYOUT_FILE_PATH]
+
+
+def read_model_schema(source):
+    """
+    DataModelSchema bytes from a .pbit, or a model JSON (DataModelSchema
+    or model.bim export) as-is. `source` is a path or a file object.
+    """
+    if zipfile.is_zipfile(source):
+        return read_archive_members(source, (SCHEMA_FILE_NAME,))[SCHEMA_FILE_NAME]
+
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def pbix_members(layout_raw, schema_raw):
+    """Same shape as read_archive_members() of a .pbit, for analyze_members()."""
+    return {SCHEMA_FILE_NAME: schema_raw, LAYOUT_FILE_PATH: layout_raw}
@@ -0,0 +1,101 @@
+from services.dependency_graph import strongly_connected_components
+
+
+class ImpactIndex:
+    """
+    "What breaks if I delete X": for every field, the measures and
+    calculated columns that depend on it (directly or transitively),
+    the visuals and filters using it or any of those dependents, and
+    the relationships built on it.
+
+    Everything is precomputed once per AnalysisResult as int bitsets:
+    strongly connected components of the reverse dependency graph are
+    visited dependents-first, so each component's closure is the union
+    of its dependents' closures. A query is then a list lookup plus
+    decoding the bits of the answer.
+    """
+    __slots__ = ("result", "direct", "closure", "visual_closure", "relationships_by_field")
+
+    def __init__(self, result):
+        self.result = result
+        count = len(result.fields)
+
+        dependents = [[] for _ in range(count)]
+        for source, target in result.dependency_edges:
+            dependents[target].append(source)
+
+        self.direct = [0] * count
+        for target, sources in enumerate(dependents):
+            for source in sources:
+                self.direct[target] |= 1 << source
+
+        visuals_by_field = [0] * count
+        for visual_id, bits in enumerate(result.visual_bits):
+            for field_id in result.fields.positions(bits):
+                visuals_by_field[field_id] |= 1 << visual_id
+
+        self.closure = [0] * count
+        self.visual_closure = [0] * count
+
+        # Dependents-first order on the reverse graph
+        for component in strongly_connected_components(dependents):
+            closure = 0
+            visual_closure = 0
+
+            for node in component:
+                visual_closure |= visuals_by_field[node]
+                for source in dependents[node]:
+                    # Members of the same component are not final yet,
+                    # but each of them is in `component` and handled here
+                    closure |= (1 << source) | self.closure[source]
+                    visual_closure |= self.visual_closure[source]
+
+            if len(component) > 1:
+                # A cycle: every member depends on every other one
+                for node in component:
+                    closure |= 1 << node
+
+            for node in component:
+                self.closure[node] = closure
+                self.visual_closure[node] = visual_closure
+
+        self.relationships_by_field = {}
+        for index, (from_id, to_id) in enumerate(result.relationship_links):
+            self.relationships_by_field.setdefault(from_id, []).append(index)
+            self.relationships_by_field.setdefault(to_id, []).append(index)
+
+    def __contains__(self, field):
+        return field in self.result.fields
+
+    def impact(self, field):
+        """
+        Returns the impact of removing `field` ("Table[Name]") as lists
+        of names, or None if the field is not in the model.
+        """
+        result = self.result
+        field_id = result.fields.ids.get(field)
+        if field_id is None:
+            return None
+
+        own_bit = 1 << field_id
+        closure = self.closure[field_id] & ~own_bit
+        direct = self.direct[field_id] & ~own_bit
+
+        # Relationships on the field itself or on a dependent calculated column
+        relationships = []
+        for column_id in result.fields.positions((closure | own_bit) & result.column_bits):
+            for index in self.relationships_by_field.get(column_id, ()):
+                from_id, to_id = result.relationship_links[index]
+                link = (result.fields.names[from_id], result.fields.names[to_id])
+                if link not in relationships:
+                    relationships.append(link)
+
+        return {
+            "field": field,
+            "direct_dependents": result.fields.fields(direct),
+            "measures": result.fields.fields(closure & result.measure_bits),
+            "calculated_columns": result.fields.fields(closure & result.column_bits),
+            "visuals": [result.visuals[v] for v in result.fields.positions(self.visual_closure[field_id])],
+            "relationships": relationships
+        }
+
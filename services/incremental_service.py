@@ -0,0 +1,138 @@
+from core.layout_stream import REPORT, SECTION
+from core.profiling import StageProfiler
+from models.snapshot_model import AnalysisSnapshot, GraphState
+from services.analysis_service import run_branches, usage_stage
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+
+# =========================
+# INCREMENTAL ANALYSIS PIPELINE
+# =========================
+
+def analyze_incremental(members, snapshot=None, profiler=None, parallel=True, stream=None, overlap=None):
+    """
+    analyze_members() for a new version of a report whose previous
+    analysis left `snapshot` (an AnalysisSnapshot). Only DAX
+    expressions whose text changed are tokenized again and only
+    embedded JSON strings of the layout that changed are parsed again.
+    While the model keeps the same columns and measures, the earlier
+    dependency graph is reused with only the changed expressions
+    resolved again, and the earlier used closure and cycles are
+    patched around them; otherwise both are rebuilt from the kept
+    tokens.
+
+    Returns (AnalysisResult, AnalysisSnapshot of this version, changes):
+    changes has one row per added, removed or modified measure, column,
+    page or visual, and is None when there was no snapshot.
+    `parallel` and `overlap` are as in analyze_members().
+    """
+    profiler = profiler or StageProfiler()
+    overlap = parallel if overlap is None else overlap
+    previous = snapshot or AnalysisSnapshot()
+
+    # Filled by the stages with this version's intermediate results
+    references = dict(previous.references)
+    parsed_texts = dict(previous.parsed_texts)
+    fingerprints = []
+
+    model, layout = run_branches(
+        members, profiler, overlap, parallel, stream, references, previous.graph, parsed_texts, fingerprints
+    )
+
+    result = usage_stage(model, layout, profiler, previous.graph)
+
+    with profiler.stage("snapshot"):
+        # Only the expressions of this version are kept
+        expressions = model.metadata["expressions"]
+        references = {field: references[field] for field in expressions}
+
+        current = AnalysisSnapshot(
+            _field_digests(model.metadata, references),
+            references,
+            parsed_texts,
+            _container_digests(fingerprints),
+            GraphState(
+                result.fields.names,
+                result.dependency_edges,
+                result.direct_bits | result.relationship_bits,
+                result.used_bits,
+                result.dependency_cycles
+            )
+        )
+
+        changes = changed_objects(previous, current) if snapshot is not None else None
+
+    profiler.count("tokenized_expressions", sum(
+        1 for field, entry in references.items() if previous.references.get(field) is not entry
+    ))
+    profiler.count("parsed_texts", len(parsed_texts.keys() - previous.parsed_texts.keys()))
+    if changes is not None:
+        profiler.count("changed_objects", len(changes))
+    if model.changed_fields is not None:
+        profiler.count("reresolved_expressions", len(model.changed_fields))
+
+    result.profile = profiler.to_dict()
+    return result, current, changes
+
+
+def changed_objects(previous, current):
+    """One {"Object", "Type", "Change"} row per object that differs between two snapshots."""
+    rows = []
+
+    for before, after in ((previous.fields, current.fields), (previous.containers, current.containers)):
+        for name in sorted(after.keys() | before.keys()):
+            old = before.get(name)
+            new = after.get(name)
+
+            if old is None:
+                rows.append({"Object": name, "Type": new[0], "Change": ADDED})
+            elif new is None:
+                rows.append({"Object": name, "Type": old[0], "Change": REMOVED})
+            elif old != new:
+                rows.append({"Object": name, "Type": new[0], "Change": MODIFIED})
+
+    return rows
+
+
+# =========================
+# PER-OBJECT DIGESTS
+# =========================
+
+def _field_digests(metadata, references):
+    fields = {}
+
+    for column in metadata["columns"]:
+        entry = references.get(column)
+        fields[column] = ("Calculated Column", entry[0]) if entry else ("Column", "")
+
+    for measure in metadata["measures"]:
+        entry = references.get(measure)
+        fields[measure] = ("Measure", entry[0] if entry else "")
+
+    return fields
+
+
+def _container_digests(fingerprints):
+    containers = {}
+
+    for kind, page, label, digest in fingerprints:
+        if kind == REPORT:
+            kind, name = "Report", label
+        elif kind == SECTION:
+            kind, name = "Page", page
+        else:
+            kind, name = "Visual", f"{page} / {label}"
+
+        # Untitled visuals of the same type can share a label
+        key = name
+        count = 1
+        while key in containers:
+            count += 1
+            key = f"{name} #{count}"
+
+        containers[key] = (kind, digest)
+
+    return containers
@@ -1,113 +1,365 @@
 
 import os
 import json
-from core.json_loader import load_json
+import hashlib
+from config.settings import LAYOUT_PARALLEL_MIN_CHARS, LAYOUT_PARSE_WORKERS
+from core.constants import EMBEDDED_JSON_KEYS
+from core.layout_stream import iter_layout_objects, REPORT, SECTION, VISUAL
 
 
 # ---------------------------------------------
-# Internal recursive field extractor
+# Field extractor (explicit stack, single pass)
 # ---------------------------------------------
-def _extract_fields(obj, used_fields, alias_map=None):
+class _AliasScope:
+    """Stack marker that restores the enclosing alias map when popped."""
+    __slots__ = ("aliases",)
 
-    if isinstance(obj, dict):
+    def __init__(self, aliases):
+        self.aliases = aliases
 
-        # Column
-        if "Column" in obj:
-            col = obj["Column"]
-            prop = col.get("Property")
-            source = col.get("Expression", {}).get("SourceRef", {}).get("Source")
-            entity = col.get("Expression", {}).get("SourceRef", {}).get("Entity")
 
-            table = alias_map.get(source) if alias_map and source else entity
+def extract_fields(obj, used_fields, alias_map=None):
+    """
+    Walks a parsed Layout JSON fragment once, without recursion, adding
+    every referenced Table[Column] / Table[Measure] to used_fields.
+    A node with a "From" list opens a new alias scope for its subtree.
+    """
+    stack = [obj]
+    aliases = alias_map
 
-            if table and prop:
-                used_fields.add(f"{table}[{prop}]")
+    while stack:
+        node = stack.pop()
+        node_type = node.__class__
 
-        # Measure
-        if "Measure" in obj:
-            msr = obj["Measure"]
-            prop = msr.get("Property")
-            source = msr.get("Expression", {}).get("SourceRef", {}).get("Source")
-            entity = msr.get("Expression", {}).get("SourceRef", {}).get("Entity")
+        if node_type is dict:
 
-            table = alias_map.get(source) if alias_map and source else entity
+            if "From" in node and node["From"].__class__ is list:
+                # Children are pushed above the marker, so the whole
+                # subtree is walked before the outer scope comes back
+                stack.append(_AliasScope(aliases))
+                aliases = dict(aliases) if aliases else {}
+                for f in node["From"]:
+                    if f.__class__ is dict:
+                        aliases[f.get("Name")] = f.get("Entity")
 
-            if table and prop:
-                used_fields.add(f"{table}[{prop}]")
+            # Column
+            if "Column" in node and node["Column"].__class__ is dict:
+                field = _field_name(node["Column"], aliases)
+                if field:
+                    used_fields.add(field)
 
-        # Aggregation
-        if "Aggregation" in obj:
-            _extract_fields(obj["Aggregation"], used_fields, alias_map)
+            # Measure
+            if "Measure" in node and node["Measure"].__class__ is dict:
+                field = _field_name(node["Measure"], aliases)
+                if field:
+                    used_fields.add(field)
 
-        # Recursive
-        for v in obj.values():
-            _extract_fields(v, used_fields, alias_map)
+            stack.extend(node.values())
 
-    elif isinstance(obj, list):
-        for item in obj:
-            _extract_fields(item, used_fields, alias_map)
+        elif node_type is list:
+            stack.extend(node)
+
+        elif node_type is _AliasScope:
+            aliases = node.aliases
+
+
+def _field_name(ref, aliases):
+
+    prop = ref.get("Property")
+    expression = ref.get("Expression")
+    source_ref = expression.get("SourceRef") if isinstance(expression, dict) else None
+
+    if not isinstance(source_ref, dict):
+        return None
+
+    source = source_ref.get("Source")
+    table = aliases.get(source) if aliases and source else source_ref.get("Entity")
+
+    if isinstance(table, str) and isinstance(prop, str):
+        return f"{table.strip()}[{prop.strip()}]"
+
+    return None
 
 
 # ---------------------------------------------
-# Public function
+# Public functions
 # ---------------------------------------------
-def parse_layout_usage(base_path):
+def scan_layout(layout_json, keys=EMBEDDED_JSON_KEYS, parallel=True, visual_usage=None,
+                parsed_texts=None, fingerprints=None):
+    """
+    Collects the JSON-encoded strings (filters, query, config,
+    dataTransforms) of the report, its pages and its visuals, parses
+    each distinct string once and merges the fields they reference.
+    Large reports are parsed in a process pool unless parallel=False
+    (e.g. when the caller already runs one analysis per process).
+
+    If a `visual_usage` list is given, it also receives a (page, visual,
+    fields) entry for the report filters, every page's filters and
+    every visual that references at least one field.
+
+    `parsed_texts` (digest -> parse result) carries the strings of an
+    earlier version of the report: only strings missing from it are
+    parsed, and on return it holds exactly this report's strings.
+    A `fingerprints` list receives (kind, page, label, digest) per
+    container, kind being REPORT, SECTION or VISUAL.
+    """
+    # Each container's strings, in document order; identical strings
+    # repeated across containers are parsed once
+    containers = []
+    for page, label, container, container_keys in _iter_containers(layout_json, keys):
+        container_texts = {}
+        _add_texts(container_texts, container, container_keys)
+        containers.append((page, label, container_texts))
+
+    texts = list(dict.fromkeys(t for _, _, container_texts in containers for t in container_texts))
+
+    if parsed_texts is None:
+        by_text = dict(zip(texts, _parse_all(texts, parallel)))
+        digests = {}
+    else:
+        digests = {t: text_digest(t) for t in texts}
+        missing = [t for t in texts if digests[t] not in parsed_texts]
+        parsed_texts.update(zip((digests[t] for t in missing), _parse_all(missing, parallel)))
+
+        by_text = {t: parsed_texts[digests[t]] for t in texts}
+        parsed_texts.clear()
+        parsed_texts.update((digests[t], by_text[t]) for t in texts)
 
     used_fields = set()
+    for fields, _ in by_text.values():
+        used_fields.update(fields)
 
-    layout_path = os.path.join(base_path, "Report", "Layout")
-    layout_json = load_json(layout_path)
+    if visual_usage is None and fingerprints is None:
+        return used_fields
 
-    for section in layout_json.get("sections", []):
+    for page, label, container_texts in containers:
+        parsed = [by_text[t] for t in container_texts]
+
+        if visual_usage is not None:
+            _add_usage(visual_usage, page, label, parsed)
+
+        if fingerprints is not None:
+            digest = _container_digest(digests.get(t) or text_digest(t) for t in container_texts)
+            fingerprints.append((_container_kind(page, label), page, _container_label(label, parsed), digest))
+
+    return used_fields
+
+
+def scan_layout_stream(raw, keys=EMBEDDED_JSON_KEYS, visual_usage=None, parsed_texts=None, fingerprints=None):
+    """
+    Streaming scan_layout() over the raw Layout bytes: each visual and
+    page is decoded, parsed, scanned and dropped before the next one,
+    so the whole document never exists as one object tree.
+    Returns (used_fields, visual_count).
+
+    Only the digests of the strings already merged are kept, not their
+    parse results (unless `parsed_texts` asks for them): memory grows
+    with the largest visual, not with the number of distinct strings.
+    """
+    used_fields = set()
+    seen = set()
+    previous = parsed_texts or {}
+    kept = {} if parsed_texts is not None else None
+    per_container = visual_usage is not None or fingerprints is not None
+    visuals = 0
+
+    # A page is yielded after its visuals: their usage waits for its name
+    page_usage = []
+    page_fingerprints = []
+
+    for kind, obj in iter_layout_objects(raw):
+        texts = {}
+
+        if kind == REPORT:
+            page, label, container_keys = _REPORT_PAGE, _REPORT_FILTERS, [k for k in ("filters",) if k in keys]
+        elif kind == SECTION:
+            page, label, container_keys = _page_name(obj), _PAGE_FILTERS, keys
+        else:
+            page, label, container_keys = None, None, keys
+            visuals += 1
+
+        _add_texts(texts, obj, container_keys)
+
+        parsed = []
+        digests = []
+        for text in texts:
+            # Same de-duplication as scan_layout(), keyed by
+            # digest so the strings themselves are not kept alive
+            digest = text_digest(text)
+            digests.append(digest)
+
+            if digest in seen and not per_container:
+                continue
+
+            # A repeated string is parsed again only when its container
+            # needs the result (mostly short filters like "[]")
+            result = previous.get(digest) or (kept or {}).get(digest) or _parse_embedded(text)
+            parsed.append(result)
+
+            if digest not in seen:
+                seen.add(digest)
+                used_fields.update(result[0])
+                if kept is not None:
+                    kept[digest] = result
+
+        if fingerprints is not None:
+            entry = (kind, page, _container_label(label, parsed), _container_digest(digests))
+            if kind == VISUAL:
+                page_fingerprints.append(entry)
+            else:
+                fingerprints.append(entry)
+                if kind == SECTION:
+                    fingerprints.extend((VISUAL, page, v_label, digest) for _, _, v_label, digest in page_fingerprints)
+                    page_fingerprints = []
+
+        if visual_usage is None:
+            continue
+
+        if kind == VISUAL:
+            _add_usage(page_usage, None, label, parsed)
+        elif kind == SECTION:
+            _add_usage(visual_usage, page, label, parsed)
+            visual_usage.extend((page, v_label, fields) for _, v_label, fields in page_usage)
+            page_usage = []
+        else:
+            _add_usage(visual_usage, page, label, parsed)
+
+    if parsed_texts is not None:
+        parsed_texts.clear()
+        parsed_texts.update(kept)
+
+    return used_fields, visuals
+
+
+# ---------------------------------------------
+# Containers (report, pages, visuals)
+# ---------------------------------------------
+_REPORT_PAGE = "(report)"
+_REPORT_FILTERS = "Report filters"
+_PAGE_FILTERS = "Page filters"
 
-        # Page filters
-        if section.get("filters"):
-            try:
-                _extract_fields(json.loads(section["filters"]), used_fields)
-            except:
-                pass
 
+def _iter_containers(layout_json, keys):
+    """Yields (page, label, container, keys); label None = from the visual config."""
+
+    # Report level: only filters; the report config holds bookmarks and
+    # settings rather than field usage
+    report_keys = [k for k in ("filters",) if k in keys]
+    if report_keys:
+        yield _REPORT_PAGE, _REPORT_FILTERS, layout_json, report_keys
+
+    for section in layout_json.get("sections", []):
+        page = _page_name(section)
+        yield page, _PAGE_FILTERS, section, keys
         for visual in section.get("visualContainers", []):
+            yield page, None, visual, keys
 
-            # Visual filters
-            if visual.get("filters"):
-                try:
-                    _extract_fields(json.loads(visual["filters"]), used_fields)
-                except:
-                    pass
-
-            # Query parsing
-            if visual.get("query"):
-                try:
-                    q_json = json.loads(visual["query"])
-                    for cmd in q_json.get("Commands", []):
-                        sqd = cmd.get("SemanticQueryDataShapeCommand", {})
-                        query_part = sqd.get("Query", {})
-
-                        alias_map = {
-                            f.get("Name"): f.get("Entity")
-                            for f in query_part.get("From", [])
-                        }
-
-                        _extract_fields(query_part, used_fields, alias_map)
-                except:
-                    pass
-
-            # Config parsing
-            if visual.get("config"):
-                try:
-                    cfg_json = json.loads(visual["config"])
-                    proto = cfg_json.get("singleVisual", {}).get("prototypeQuery", {})
-
-                    alias_map = {
-                        f.get("Name"): f.get("Entity")
-                        for f in proto.get("From", [])
-                    }
-
-                    _extract_fields(proto, used_fields, alias_map)
-                    _extract_fields(cfg_json, used_fields, alias_map)
-
-                except:
-                    pass
 
-    return used_fields
+def _container_kind(page, label):
+    if label is None:
+        return VISUAL
+    return REPORT if page == _REPORT_PAGE else SECTION
+
+
+def _page_name(section):
+    return section.get("displayName") or section.get("name") or "Page"
+
+
+def _add_texts(texts, container, keys):
+    for key in keys:
+        text = container.get(key)
+        if text and isinstance(text, str):
+            texts[text] = None
+
+
+def _add_usage(visual_usage, page, label, parsed):
+    fields = set()
+    for text_fields, _ in parsed:
+        fields.update(text_fields)
+
+    if fields:
+        visual_usage.append((page, _container_label(label, parsed), fields))
+
+
+def _container_label(label, parsed):
+    for _, text_label in parsed:
+        label = label or text_label
+    return label or "Visual"
+
+
+# ---------------------------------------------
+# Content digests (re-analysis of a new version)
+# ---------------------------------------------
+def text_digest(text):
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _container_digest(digests):
+    """One digest over the digests of a container's embedded strings."""
+    return hashlib.blake2b("".join(digests).encode("ascii"), digest_size=16).hexdigest()
+
+
+# ---------------------------------------------
+# Internal embedded JSON parsing
+# ---------------------------------------------
+def _parse_all(texts, parallel=True):
+
+    total_size = sum(len(t) for t in texts)
+    workers = min(LAYOUT_PARSE_WORKERS or os.cpu_count() or 1, len(texts))
+
+    if parallel and workers > 1 and total_size >= LAYOUT_PARALLEL_MIN_CHARS:
+        # Only large reports get here: multiprocessing is imported on first use
+        from core.process_pool import run_with_pool
+
+        chunksize = max(1, len(texts) // (workers * 4))
+        parsed = run_with_pool(workers, lambda pool: list(pool.map(_parse_embedded, texts, chunksize=chunksize)))
+        if parsed is not None:
+            return parsed
+
+    return [_parse_embedded(t) for t in texts]
+
+
+def _parse_embedded(text):
+    """
+    Parses one embedded JSON string and returns (fields it references,
+    visual label or None when the string is not a visual config).
+    """
+    used_fields = set()
+
+    try:
+        obj = json.loads(text)
+    except ValueError:
+        return used_fields, None
+
+    alias_map = None
+    label = None
+
+    # Visual config: prototypeQuery aliases stay the default for the
+    # rest of the config; one walk covers prototypeQuery as well
+    if isinstance(obj, dict) and isinstance(obj.get("singleVisual"), dict):
+        label = _visual_label(obj)
+        proto = obj["singleVisual"].get("prototypeQuery")
+        if isinstance(proto, dict) and isinstance(proto.get("From"), list):
+            alias_map = {
+                f.get("Name"): f.get("Entity")
+                for f in proto["From"] if isinstance(f, dict)
+            }
+
+    extract_fields(obj, used_fields, alias_map)
+    return used_fields, label
+
+
+def _visual_label(config):
+    """'Title (visualType)' when the visual has a literal title, else 'visualType name'."""
+    visual = config["singleVisual"]
+    visual_type = visual.get("visualType") or "visual"
+
+    try:
+        title = visual["vcObjects"]["title"][0]["properties"]["text"]["expr"]["Literal"]["Value"]
+        title = title.strip("'")
+    except (KeyError, IndexError, TypeError, AttributeError):
+        title = None
+
+    if title:
+        return f"{title} ({visual_type})"
+    return f"{visual_type} {config.get('name', '')}".strip()
@@ -0,0 +1,168 @@
+from collections import namedtuple
+
+from config.settings import LINEAGE_DEFAULT_HOPS, LINEAGE_MAX_NODES, LINEAGE_CACHE_SIZE
+
+UPSTREAM = "upstream"
+DOWNSTREAM = "downstream"
+
+COLUMN = "column"
+MEASURE = "measure"
+VISUAL = "visual"
+
+# nodes: (key, label, kind, hops from the field); edges: (from key, to key)
+# in data-flow order (referenced field -> referencing field -> visual);
+# omitted: neighbours left out once the node budget was reached
+Lineage = namedtuple("Lineage", ["field", "direction", "hops", "nodes", "edges", "omitted"])
+
+# Graphviz attributes per node kind
+_NODE_STYLES = {
+    COLUMN: 'shape=box, style="rounded,filled", fillcolor="#e8f1fb"',
+    MEASURE: 'shape=ellipse, style=filled, fillcolor="#efe6fa"',
+    VISUAL: 'shape=note, style=filled, fillcolor="#fdf3dc"'
+}
+
+
+class LineageGraph:
+    """
+    Server-side dependency graph of one AnalysisResult, for exploring
+    the k-hop neighborhood of one field at a time instead of drawing the
+    whole model.
+
+    Adjacency lists are built once from the result's dependency edges
+    and visual usage. A query is a breadth-first walk that stops at
+    `hops` levels or `max_nodes` nodes, whichever comes first, so its
+    cost depends on the neighborhood, not on the model size. Answers
+    are kept per (field, direction, hops, budget), oldest dropped first.
+    """
+    __slots__ = ("result", "kinds", "dependencies", "dependents", "visuals_by_field", "_cache")
+
+    def __init__(self, result):
+        self.result = result
+        count = len(result.fields)
+
+        self.kinds = [COLUMN] * count
+        for field_id in result.fields.positions(result.measure_bits):
+            self.kinds[field_id] = MEASURE
+
+        self.dependencies = [[] for _ in range(count)]
+        self.dependents = [[] for _ in range(count)]
+        for source, target in result.dependency_edges:
+            self.dependencies[source].append(target)
+            self.dependents[target].append(source)
+
+        self.visuals_by_field = [[] for _ in range(count)]
+        for visual_id, bits in enumerate(result.visual_bits):
+            for field_id in result.fields.positions(bits):
+                self.visuals_by_field[field_id].append(visual_id)
+
+        self._cache = {}
+
+    def __contains__(self, field):
+        return field in self.result.fields
+
+    def neighborhood(self, field, direction=DOWNSTREAM, hops=LINEAGE_DEFAULT_HOPS, max_nodes=LINEAGE_MAX_NODES):
+        """
+        Fields `field` depends on (UPSTREAM) or fields and visuals that
+        depend on it (DOWNSTREAM), up to `hops` references away, as a
+        Lineage; None if the field is not in the model.
+        """
+        field_id = self.result.fields.ids.get(field)
+        if field_id is None:
+            return None
+
+        key = (field_id, direction, hops, max_nodes)
+        lineage = self._cache.get(key)
+        if lineage is None:
+            lineage = self._walk(field_id, direction, hops, max_nodes)
+            if len(self._cache) >= LINEAGE_CACHE_SIZE:
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = lineage
+
+        return lineage
+
+    # ---------------------------------------------
+    # Internal helpers
+    # ---------------------------------------------
+    def _walk(self, field_id, direction, hops, max_nodes):
+        result = self.result
+        names = result.fields.names
+        upstream = direction == UPSTREAM
+        adjacency = self.dependencies if upstream else self.dependents
+
+        kinds = self.kinds
+
+        nodes = [(_field_key(field_id), names[field_id], kinds[field_id], 0)]
+        seen = {nodes[0][0]}
+        edges = []
+        omitted = set()
+        frontier = [field_id]
+
+        for depth in range(1, hops + 1):
+            next_frontier = []
+
+            for node_id in frontier:
+                node_key = _field_key(node_id)
+
+                neighbours = [(_field_key(n), n, False) for n in adjacency[node_id]]
+                if not upstream:
+                    # Visuals end a downstream path
+                    neighbours += [(_visual_key(v), v, True) for v in self.visuals_by_field[node_id]]
+
+                for key, neighbour_id, visual in neighbours:
+                    if key not in seen:
+                        if len(nodes) >= max_nodes:
+                            omitted.add(key)
+                            continue
+
+                        seen.add(key)
+                        if visual:
+                            page, label = result.visuals[neighbour_id]
+                            nodes.append((key, f"{page} / {label}", VISUAL, depth))
+                        else:
+                            nodes.append((key, names[neighbour_id], kinds[neighbour_id], depth))
+                            next_frontier.append(neighbour_id)
+
+                    edges.append((key, node_key) if upstream else (node_key, key))
+
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        return Lineage(names[field_id], direction, hops, nodes, sorted(set(edges)), len(omitted))
+
+
+def _field_key(field_id):
+    return f"f{field_id}"
+
+
+def _visual_key(visual_id):
+    return f"v{visual_id}"
+
+
+# ---------------------------------------------
+# Rendering
+# ---------------------------------------------
+def to_dot(lineage):
+    """Graphviz DOT source of a Lineage, left to right in data-flow order."""
+    lines = [
+        "digraph lineage {",
+        '    rankdir=LR;',
+        '    node [fontname="Helvetica", fontsize=10];',
+        '    edge [color="#8a8a8a", arrowsize=0.6];'
+    ]
+
+    for key, label, kind, depth in lineage.nodes:
+        style = _NODE_STYLES[kind]
+        if depth == 0:
+            style += ", penwidth=2.5"
+        lines.append(f'    {key} [label="{_escape(label)}", {style}];')
+
+    for source, target in lineage.edges:
+        lines.append(f"    {source} -> {target};")
+
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _escape(label):
+    return label.replace("\\", "\\\\").replace('"', '\\"')
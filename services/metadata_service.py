@@ -1,31 +1,79 @@
+from core.constants import SYSTEM_DATE_ANNOTATIONS
+
+
+def is_system_date_table(table):
+    """
+    Power BI auto-creates hidden LocalDateTable_xxxxx tables.
+    We exclude them to avoid incorrect unused detection.
+    """
+    for ann in table.get("annotations", []):
+        if ann.get("name") in SYSTEM_DATE_ANNOTATIONS and ann.get("value") == "true":
+            return True
+    return False
+
 
 def collect_metadata(schema_json):
 
     model = schema_json.get("model", {})
     tables = model.get("tables", [])
+    relationships = model.get("relationships", [])
 
     all_tables = set()
     all_columns = set()
     all_measures = set()
-    dax_expressions = []
+    expressions = {}
+    relationship_columns = set()
+    relationship_pairs = []
 
     for table in tables:
+
+        if is_system_date_table(table):
+            continue
+
         table_name = table.get("name")
         all_tables.add(table_name)
 
         for col in table.get("columns", []):
-            all_columns.add(f"{table_name}[{col.get('name')}]")
+            col_name = f"{table_name}[{col.get('name')}]"
+            all_columns.add(col_name)
             if col.get("expression"):
-                dax_expressions.append(col["expression"])
+                expressions[col_name] = col["expression"]
 
         for msr in table.get("measures", []):
-            all_measures.add(f"{table_name}[{msr.get('name')}]")
+            msr_name = f"{table_name}[{msr.get('name')}]"
+            all_measures.add(msr_name)
             if msr.get("expression"):
-                dax_expressions.append(msr["expression"])
+                expressions[msr_name] = msr["expression"]
+
+    # Relationship keys count as used because they affect filtering
+    for rel in relationships:
+
+        from_table = rel.get("fromTable")
+        from_column = rel.get("fromColumn")
+        to_table = rel.get("toTable")
+        to_column = rel.get("toColumn")
+
+        # Skip LocalDateTable relationships
+        if from_table and from_table.startswith("LocalDateTable_"):
+            continue
+        if to_table and to_table.startswith("LocalDateTable_"):
+            continue
+
+        if from_table and from_column:
+            relationship_columns.add(f"{from_table}[{from_column}]")
+
+        if to_table and to_column:
+            relationship_columns.add(f"{to_table}[{to_column}]")
+
+        if from_table and from_column and to_table and to_column:
+            relationship_pairs.append((f"{from_table}[{from_column}]", f"{to_table}[{to_column}]"))
 
     return {
         "tables": all_tables,
         "columns": all_columns,
         "measures": all_measures,
-        "dax_expressions": dax_expressions
+        "expressions": expressions,
+        "relationships": relationships,
+        "relationship_columns": relationship_columns,
+        "relationship_pairs": relationship_pairs
     }
@@ -1,6 +1,5 @@
-import os
-from core.json_loader import load_json
-
-def load_schema(base_path):
-    return load_json(os.path.join(base_path, "DataModelSchema"))
+from core.constants import SCHEMA_FILE_NAME
+from core.json_loader import loads_json
 
+def load_schema_bytes(raw):
+    return loads_json(raw, SCHEMA_FILE_NAME)
@@ -0,0 +1,132 @@
+import os
+from collections import namedtuple
+from config.settings import SHARED_DATASET_WORKERS
+from core.process_pool import run_with_pool
+from core.profiling import StageProfiler
+from services.analysis_service import model_stage, layout_stage
+from services.usage_service import compute_usage
+
+
+# One report's visuals and usage, as bitsets over the shared model's fields:
+# direct = referenced by its visuals/filters, used = direct plus DAX lineage
+ReportUsage = namedtuple("ReportUsage", ["report", "visuals", "direct_bits", "used_bits"])
+
+
+# =========================
+# SHARED DATASET PIPELINE
+# =========================
+
+def analyze_shared_dataset(schema_raw, layouts, profiler=None, workers=SHARED_DATASET_WORKERS):
+    """
+    Analyzes many thin reports bound to one model. `layouts` maps report
+    names to their Report/Layout bytes.
+
+    The schema, metadata and DAX graph are built once while the layouts
+    are scanned in a process pool; the reports' direct usage is merged
+    and propagated once. Returns (AnalysisResult of the union, list of
+    ReportUsage in `layouts` order). Visuals in the result are labelled
+    "report / page" so impact analysis shows which report breaks.
+    """
+    profiler = profiler or StageProfiler()
+    names = list(layouts)
+    raws = [layouts[name] for name in names]
+
+    with profiler.stage("scan_reports"):
+        model, stages = _scan_all(raws, workers, lambda: model_stage(schema_raw, profiler))
+
+    used_fields = set()
+    visual_usage = []
+
+    for name, stage in zip(names, stages):
+        profiler.count("reports", 1)
+        profiler.count("visuals", stage.visuals)
+        used_fields |= stage.used_fields
+        visual_usage.extend((f"{name} / {page}", label, fields) for page, label, fields in stage.visual_usage)
+
+    profiler.count("layout_bytes", sum(len(raw) for raw in raws))
+
+    with profiler.stage("propagate"):
+        result = compute_usage(
+            used_fields,
+            model.metadata,
+            model.dependency_graph,
+            model.metadata["relationship_columns"],
+            visual_usage
+        )
+
+    # Per report lineage through the same graph, as bitsets
+    with profiler.stage("report_lineage"):
+        reports = [
+            ReportUsage(
+                name,
+                stage.visuals,
+                result.fields.bits(stage.used_fields),
+                result.fields.bits(model.dependency_graph.closure(stage.used_fields))
+            )
+            for name, stage in zip(names, stages)
+        ]
+
+    result.profile = profiler.to_dict()
+    return result, reports
+
+
+def report_rows(result, reports):
+    """
+    One summary row per report. "Only This Report" counts the model
+    fields no other report uses, directly or through DAX.
+    """
+    # used_bits of all reports before / after each one, so the union of
+    # the others is two ORs per report
+    before = [0]
+    for report in reports:
+        before.append(before[-1] | report.used_bits)
+    after = [0]
+    for report in reversed(reports):
+        after.append(after[-1] | report.used_bits)
+    after.reverse()
+
+    model_bits = result.column_bits | result.measure_bits
+    rows = []
+
+    for index, report in enumerate(reports):
+        others = before[index] | after[index + 1]
+        rows.append({
+            "Report": report.report,
+            "Visuals": report.visuals,
+            "Direct Fields": (report.direct_bits & model_bits).bit_count(),
+            "Used Columns": (report.used_bits & result.column_bits).bit_count(),
+            "Used Measures": (report.used_bits & result.measure_bits).bit_count(),
+            "Only This Report": (report.used_bits & model_bits & ~others).bit_count()
+        })
+
+    return rows
+
+
+# =========================
+# LAYOUT SCANS (PROCESS POOL)
+# =========================
+
+def _scan_report(layout_raw):
+    # One report per worker process already: no nested layout pool
+    return layout_stage(layout_raw, StageProfiler(trace_memory=False), parallel=False)
+
+
+def _scan_all(raws, workers, build_model):
+    """
+    Scans every layout in a process pool while `build_model` runs in
+    this thread. Returns (model, layout stages in input order).
+    """
+    workers = min(workers or os.cpu_count() or 1, len(raws))
+
+    if workers > 1:
+        scanned = run_with_pool(workers, lambda pool: _scan_in(pool, raws, build_model))
+        if scanned is not None:
+            return scanned
+
+    return build_model(), [_scan_report(raw) for raw in raws]
+
+
+def _scan_in(pool, raws, build_model):
+    scans = [pool.submit(_scan_report, raw) for raw in raws]
+    model = build_model()
+    return model, [scan.result() for scan in scans]
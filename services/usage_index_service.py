@@ -0,0 +1,320 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from config.settings import USAGE_INDEX_PATH
+from models.symbol_table import split_field
+
+# Usage of a field in one report, strongest first (as in the dashboard)
+DIRECT = "direct"
+RELATIONSHIP = "relationship"
+INDIRECT = "indirect"
+UNUSED = "unused"
+
+# Field ids, visual ids and edges are the AnalysisResult's own dense ids,
+# so a report is written with plain executemany() batches and no id
+# round-trips. Every lookup by field name or by target is an index range.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    analysis_key TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    tables INTEGER NOT NULL,
+    columns INTEGER NOT NULL,
+    measures INTEGER NOT NULL,
+    unused_columns INTEGER NOT NULL,
+    unused_measures INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS model_tables (
+    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+    name TEXT NOT NULL COLLATE NOCASE,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (report_id, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fields (
+    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+    field_id INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    table_name TEXT NOT NULL COLLATE NOCASE,
+    kind TEXT NOT NULL,
+    usage TEXT NOT NULL,
+    PRIMARY KEY (report_id, field_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS fields_by_name ON fields (name);
+
+-- Distinct field names with the number of reports having them, for search
+CREATE TABLE IF NOT EXISTS field_names (
+    name TEXT PRIMARY KEY COLLATE NOCASE,
+    reports INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS dependencies (
+    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+    source_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    PRIMARY KEY (report_id, source_id, target_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS dependencies_by_target ON dependencies (report_id, target_id);
+
+CREATE TABLE IF NOT EXISTS visuals (
+    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+    visual_id INTEGER NOT NULL,
+    page TEXT NOT NULL,
+    label TEXT NOT NULL,
+    PRIMARY KEY (report_id, visual_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS visual_fields (
+    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+    field_id INTEGER NOT NULL,
+    visual_id INTEGER NOT NULL,
+    PRIMARY KEY (report_id, field_id, visual_id)
+) WITHOUT ROWID;
+"""
+
+
+# ---------------------------------------------
+# Connection
+# ---------------------------------------------
+def connect(db_path=USAGE_INDEX_PATH):
+    """
+    Opens (and creates if needed) the index. WAL lets the UI read while
+    batch workers write; writers wait for each other up to the timeout.
+    """
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+# ---------------------------------------------
+# Writing
+# ---------------------------------------------
+def index_report(report, result, analysis_key, db_path=USAGE_INDEX_PATH):
+    """
+    Stores one AnalysisResult under `report` (file name or path),
+    replacing an earlier analysis of it, in a single transaction.
+    Returns False when the same analysis is already stored.
+    """
+    with closing(connect(db_path)) as connection:
+        row = connection.execute("SELECT analysis_key FROM reports WHERE name = ?", (report,)).fetchone()
+        if row and row[0] == analysis_key:
+            return False
+
+        with connection:
+            _delete_report(connection, report)
+            _insert_report(connection, report, result, analysis_key)
+
+    return True
+
+
+def remove_report(report, db_path=USAGE_INDEX_PATH):
+    with closing(connect(db_path)) as connection:
+        with connection:
+            _delete_report(connection, report)
+
+
+def _delete_report(connection, report):
+    row = connection.execute("SELECT id FROM reports WHERE name = ?", (report,)).fetchone()
+    if row is None:
+        return
+
+    connection.execute(
+        "UPDATE field_names SET reports = reports - 1 WHERE name IN (SELECT name FROM fields WHERE report_id = ?)",
+        row
+    )
+    connection.execute("DELETE FROM field_names WHERE reports <= 0")
+
+    # Fields, tables, edges and visuals go with it (ON DELETE CASCADE)
+    connection.execute("DELETE FROM reports WHERE id = ?", row)
+
+
+def _insert_report(connection, report, result, analysis_key):
+    summary = result.compute_summary()
+    fields = result.fields
+
+    report_id = connection.execute(
+        "INSERT INTO reports (name, analysis_key, indexed_at, tables, columns, measures, unused_columns, unused_measures)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            report, analysis_key, time.time(), summary["Total Tables"], summary["Total Columns"],
+            summary["Total Measures"], summary["Unused Columns"], summary["Unused Measures"]
+        )
+    ).lastrowid
+
+    unused_tables = result.unused_tables
+    connection.executemany(
+        "INSERT INTO model_tables (report_id, name, used) VALUES (?, ?, ?)",
+        [(report_id, table, table not in unused_tables) for table in result.tables]
+    )
+
+    connection.executemany(
+        "INSERT INTO fields (report_id, field_id, name, table_name, kind, usage) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (report_id, field_id, name, split_field(name)[0], kind, usage)
+            for field_id, (name, kind, usage) in enumerate(zip(fields.names, _kinds(result), _usages(result)))
+        ]
+    )
+    connection.executemany(
+        "INSERT INTO field_names (name, reports) VALUES (?, 1)"
+        " ON CONFLICT (name) DO UPDATE SET reports = reports + 1",
+        [(name,) for name in fields.names]
+    )
+
+    connection.executemany(
+        "INSERT OR IGNORE INTO dependencies (report_id, source_id, target_id) VALUES (?, ?, ?)",
+        [(report_id, source, target) for source, target in result.dependency_edges]
+    )
+
+    connection.executemany(
+        "INSERT INTO visuals (report_id, visual_id, page, label) VALUES (?, ?, ?, ?)",
+        [(report_id, visual_id, page, label) for visual_id, (page, label) in enumerate(result.visuals)]
+    )
+    connection.executemany(
+        "INSERT INTO visual_fields (report_id, field_id, visual_id) VALUES (?, ?, ?)",
+        [
+            (report_id, field_id, visual_id)
+            for visual_id, bits in enumerate(result.visual_bits)
+            for field_id in fields.positions(bits)
+        ]
+    )
+
+
+def _kinds(result):
+    kinds = ["column"] * len(result.fields)
+    for field_id in result.fields.positions(result.measure_bits):
+        kinds[field_id] = "measure"
+    return kinds
+
+
+def _usages(result):
+    # Weakest first, so stronger categories overwrite
+    usages = [UNUSED] * len(result.fields)
+    positions = result.fields.positions
+    for usage, bits in (
+        (INDIRECT, result.used_bits),
+        (RELATIONSHIP, result.relationship_bits),
+        (DIRECT, result.direct_bits)
+    ):
+        for field_id in positions(bits):
+            usages[field_id] = usage
+    return usages
+
+
+# ---------------------------------------------
+# Queries
+# ---------------------------------------------
+def index_stats(db_path=USAGE_INDEX_PATH):
+    with closing(connect(db_path)) as connection:
+        reports, = connection.execute("SELECT COUNT(*) FROM reports").fetchone()
+        names, = connection.execute("SELECT COUNT(*) FROM field_names").fetchone()
+    return {"Reports": reports, "Distinct Fields": names}
+
+
+def list_reports(db_path=USAGE_INDEX_PATH):
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute(
+            "SELECT name, indexed_at, tables, columns, measures, unused_columns, unused_measures"
+            " FROM reports ORDER BY name"
+        ).fetchall()
+
+    return [
+        {
+            "Report": name,
+            "Indexed": time.strftime("%Y-%m-%d %H:%M", time.localtime(indexed_at)),
+            "Tables": tables,
+            "Columns": columns,
+            "Measures": measures,
+            "Unused Columns": unused_columns,
+            "Unused Measures": unused_measures
+        }
+        for name, indexed_at, tables, columns, measures, unused_columns, unused_measures in rows
+    ]
+
+
+def search_fields(text, limit=50, db_path=USAGE_INDEX_PATH):
+    """Distinct field names containing `text` (any case), with their report counts."""
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+    with closing(connect(db_path)) as connection:
+        return connection.execute(
+            "SELECT name, reports FROM field_names WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ?",
+            (pattern, limit)
+        ).fetchall()
+
+
+def field_usage(field, db_path=USAGE_INDEX_PATH):
+    """
+    One row per indexed report that has `field` ("Table[Name]", any
+    case): how it is used there, by how many visuals / filters and how
+    many DAX expressions reference it directly.
+    """
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute(
+            """
+            SELECT r.name, f.name, f.kind, f.usage,
+                (SELECT COUNT(*) FROM visual_fields v
+                 WHERE v.report_id = f.report_id AND v.field_id = f.field_id),
+                (SELECT COUNT(*) FROM dependencies d
+                 WHERE d.report_id = f.report_id AND d.target_id = f.field_id)
+            FROM fields f JOIN reports r ON r.id = f.report_id
+            WHERE f.name = ?
+            ORDER BY r.name
+            """,
+            (field,)
+        ).fetchall()
+
+    return [
+        {"Report": report, "Field": name, "Kind": kind, "Usage": usage, "Visuals": visuals, "Referenced By": dependents}
+        for report, name, kind, usage, visuals, dependents in rows
+    ]
+
+
+def field_visuals(field, db_path=USAGE_INDEX_PATH):
+    """Every visual and report/page filter, in any indexed report, that uses `field` directly."""
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute(
+            """
+            SELECT r.name, v.page, v.label
+            FROM fields f
+            JOIN reports r ON r.id = f.report_id
+            JOIN visual_fields vf ON vf.report_id = f.report_id AND vf.field_id = f.field_id
+            JOIN visuals v ON v.report_id = vf.report_id AND v.visual_id = vf.visual_id
+            WHERE f.name = ?
+            ORDER BY r.name, v.visual_id
+            """,
+            (field,)
+        ).fetchall()
+
+    return [{"Report": report, "Page": page, "Visual": label} for report, page, label in rows]
+
+
+def field_dependents(field, db_path=USAGE_INDEX_PATH):
+    """Measures and calculated columns whose DAX references `field` directly, per report."""
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute(
+            """
+            SELECT r.name, s.name, s.kind
+            FROM fields f
+            JOIN reports r ON r.id = f.report_id
+            JOIN dependencies d ON d.report_id = f.report_id AND d.target_id = f.field_id
+            JOIN fields s ON s.report_id = d.report_id AND s.field_id = d.source_id
+            WHERE f.name = ?
+            ORDER BY r.name, s.name
+            """,
+            (field,)
+        ).fetchall()
+
+    return [{"Report": report, "Dependent": name, "Kind": kind} for report, name, kind in rows]
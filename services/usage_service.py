@@ -1,20 +1,63 @@
-def compute_usage(used_fields, metadata):
-
-    used_columns = used_fields.intersection(metadata["columns"])
-    used_measures = used_fields.intersection(metadata["measures"])
-
-    unused_columns = metadata["columns"] - used_columns
-    unused_measures = metadata["measures"] - used_measures
-
-    return {
-        "used_columns": used_columns,
-        "unused_columns": unused_columns,
-        "used_measures": used_measures,
-        "unused_measures": unused_measures,
-        "summary": {
-            "Total Tables": len(metadata["tables"]),
-            "Total Columns": len(metadata["columns"]),
-            "Total Measures": len(metadata["measures"])
-        }
-    }
+from models.analysis_model import AnalysisResult
 
+def compute_usage(used_fields, metadata, dependency_graph=None, relationship_columns=(), visual_usage=()):
+
+    result = AnalysisResult(
+        metadata["tables"],
+        metadata["columns"],
+        metadata["measures"],
+        len(metadata.get("relationships", []))
+    )
+
+    result.mark_direct(used_fields)
+    result.mark_relationship(relationship_columns)
+    result.add_relationship_links(metadata.get("relationship_pairs", ()))
+    result.add_visuals(visual_usage)
+
+    if dependency_graph is not None:
+        result.propagate(dependency_graph)
+        result.dependency_cycles = dependency_graph.find_cycles()
+
+    return result
+
+
+def update_usage(previous, changed_fields, used_fields, metadata, dependency_graph,
+                 relationship_columns=(), visual_usage=()):
+    """
+    compute_usage() for a model with the same fields as the analysis
+    `previous` (a GraphState) whose DAX changed only in `changed_fields`
+    (see update_dependency_graph()): the earlier closure and cycles
+    are kept where those edits cannot affect them.
+    """
+    result = AnalysisResult(
+        metadata["tables"],
+        metadata["columns"],
+        metadata["measures"],
+        len(metadata.get("relationships", []))
+    )
+
+    result.mark_direct(used_fields)
+    result.mark_relationship(relationship_columns)
+    result.add_relationship_links(metadata.get("relationship_pairs", ()))
+    result.add_visuals(visual_usage)
+
+    result.propagate_changes(dependency_graph, previous, changed_fields)
+
+    # A cycle with a changed field is found from that field. Any other
+    # cycle was part of an earlier one: that cycle itself if it has no
+    # changed field, else a piece of it (unless a cycle found from a
+    # changed field took it in)
+    changed = set(changed_fields)
+    cycles = dependency_graph.cycles_through(changed_fields)
+    in_cycles = {field for cycle in cycles for field in cycle}
+
+    for earlier in previous.cycles:
+        pieces = [earlier] if changed.isdisjoint(earlier) else dependency_graph.cycles_among(earlier)
+        cycles.extend(
+            cycle for cycle in pieces
+            if changed.isdisjoint(cycle) and in_cycles.isdisjoint(cycle)
+        )
+
+    result.dependency_cycles = sorted(cycles)
+
+    return result
@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from config.settings import (
+    WATCH_OUTPUT_FOLDER, WATCH_POLL_SECONDS, WATCH_DEBOUNCE_SECONDS, WATCH_WORKERS, WATCH_MAX_QUEUED
+)
+from core.process_pool import RetryingPool
+from services.batch_service import find_report_files, analyze_file
+from services.cache_service import write_atomic, dataset_name
+from services.extraction_service import is_pbix
+
+# Last analyzed stat and content hash per file, kept across restarts
+STATE_FILE_NAME = ".watch_state.json"
+RESULT_SUFFIX = ".json"
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+# ---------------------------------------------
+# Single file (runs inside a worker process)
+# ---------------------------------------------
+def analyze_if_changed(path, previous_hash=None, schema_path=None, index=False):
+    """
+    Hashes `path` and analyzes it with batch_service.analyze_file()
+    unless its content hash equals `previous_hash` (touched or copied
+    over with the same bytes). The record carries the hash and the stat
+    taken before hashing, so a write during the run is seen next poll.
+    """
+    stat = os.stat(path)
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+
+    if content_hash == previous_hash:
+        record = {"file": path, "status": "unchanged"}
+    else:
+        record = analyze_file(path, schema_path, index)
+
+        # A .pbix without a model yet is not marked as known content:
+        # it runs again once a template caches its schema
+        if record["status"] == "error" and record["error"].startswith(LookupError.__name__ + ":"):
+            content_hash = None
+
+    record.update(sha256=content_hash, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    return record
+
+
+# ---------------------------------------------
+# Folder watcher
+# ---------------------------------------------
+class FolderWatcher:
+    """
+    Polls `folder` for new or modified .pbit / .pbix files and analyzes
+    each one once per distinct content, writing one JSON result per
+    file to `output_folder`.
+
+    - A file is ready when its (mtime, size) differs from the last
+      analyzed one and has stayed the same for `debounce_seconds`, so
+      files still being copied are not picked up half-written.
+    - A queued or running file is never queued twice; a change during
+      its run is picked up by the next poll.
+    - At most `max_queued` files wait for the `workers` processes;
+      scanning pauses while the queue is full (back-pressure).
+    - .pbix reports are queued only once no template is queued or
+      running, since they may pair with the schema cached from a
+      template of the same name (like the phases of batch runs). A
+      report that found no schema is retried when a template of its
+      name is analyzed, or on the next start.
+    """
+
+    def __init__(self, folder, output_folder=WATCH_OUTPUT_FOLDER, workers=WATCH_WORKERS,
+                 poll_seconds=WATCH_POLL_SECONDS, debounce_seconds=WATCH_DEBOUNCE_SECONDS,
+                 max_queued=WATCH_MAX_QUEUED, schema_path=None, index=False, log=None):
+        self.folder = os.path.abspath(folder)
+        self.output_folder = output_folder
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self.max_queued = max(1, max_queued)
+        self.schema_path = schema_path
+        self.index = index
+        self.log = log or _log_stderr
+
+        # path -> {"mtime_ns", "size", "sha256"} of the last analysis
+        self.known = self._load_state()
+
+        # path -> ((mtime_ns, size), first seen) while the file settles
+        self.candidates = {}
+
+        # Queued or running, plus the reports held back in `waiting`
+        self.pending = set()
+        self.waiting = []
+
+        self.counts = {"ok": 0, "error": 0, "unchanged": 0}
+        self._state_dirty = False
+        self._pool = None
+
+    # ---------------------------------------------
+    # Detection
+    # ---------------------------------------------
+    def scan(self, now=None):
+        """One poll: returns the files that became ready, templates first."""
+        now = time.monotonic() if now is None else now
+        ready = []
+        present = set()
+
+        for path in find_report_files([self.folder]):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed between listing and stat
+                continue
+
+            present.add(path)
+            key = (stat.st_mtime_ns, stat.st_size)
+            known = self.known.get(path)
+
+            if known and (known["mtime_ns"], known["size"]) == key:
+                self.candidates.pop(path, None)
+                continue
+
+            if path in self.pending:
+                continue
+
+            candidate = self.candidates.get(path)
+            if candidate is None or candidate[0] != key:
+                self.candidates[path] = (key, now)
+            elif now - candidate[1] >= self.debounce_seconds:
+                del self.candidates[path]
+                ready.append(path)
+
+        # Deleted files: a file put back later is analyzed again
+        for path in [p for p in self.known if p not in present]:
+            del self.known[path]
+            self._state_dirty = True
+        for path in [p for p in self.candidates if p not in present]:
+            del self.candidates[path]
+
+        ready.sort(key=lambda p: (is_pbix(p), p))
+        return ready
+
+    # ---------------------------------------------
+    # Scheduling
+    # ---------------------------------------------
+    async def run(self, once=False):
+        """
+        Watches until cancelled; with once=True, returns as soon as every
+        file present has been analyzed (or found unchanged).
+        """
+        queue = asyncio.Queue(maxsize=self.max_queued)
+        templates_done = asyncio.Event()
+
+        self._pool = RetryingPool(self.workers)
+        workers = [asyncio.create_task(self._worker(queue, templates_done)) for _ in range(self.workers)]
+
+        try:
+            while True:
+                # Held-back reports count against the queue limit
+                if len(self.waiting) < self.max_queued:
+                    for path in self.scan():
+                        self.pending.add(path)
+                        if is_pbix(path):
+                            self.waiting.append(path)
+                        else:
+                            # Waits while the queue is full
+                            await queue.put(path)
+
+                if self.waiting and not self._templates_pending():
+                    for path in self.waiting:
+                        await queue.put(path)
+                    self.waiting = []
+
+                self._save_state()
+
+                if once and not self.candidates and not self.pending:
+                    break
+
+                # The last template finishing releases the reports at once
+                try:
+                    await asyncio.wait_for(templates_done.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                templates_done.clear()
+
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._pool.shutdown()
+            self._save_state()
+
+        return self.counts
+
+    async def _worker(self, queue, templates_done):
+        while True:
+            path = await queue.get()
+            try:
+                known = self.known.get(path)
+                try:
+                    stat = os.stat(path)
+                except OSError as e:
+                    # Removed since it was queued
+                    record = {"file": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                else:
+                    record = await self._run_in_pool(
+                        stat, analyze_if_changed, path, known and known["sha256"], self.schema_path, self.index
+                    )
+                self._finish(record)
+            finally:
+                self.pending.discard(path)
+                queue.task_done()
+                if not is_pbix(path) and self.waiting and not self._templates_pending():
+                    templates_done.set()
+
+    def _templates_pending(self):
+        return any(not is_pbix(path) for path in self.pending)
+
+    async def _run_in_pool(self, stat, fn, path, *args):
+        try:
+            return await asyncio.wrap_future(self._pool.submit(fn, path, *args))
+        except BrokenProcessPool as e:
+            # Killed its worker twice: not retried until the file changes
+            return {
+                "file": path, "status": "error", "error": f"{type(e).__name__}: {e}",
+                "sha256": None, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size
+            }
+        except Exception as e:
+            return {"file": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    def _finish(self, record):
+        path = record["file"]
+        status = record["status"]
+        self.counts[status] = self.counts.get(status, 0) + 1
+
+        if "sha256" in record:
+            self.known[path] = {k: record.pop(k) for k in ("mtime_ns", "size", "sha256")}
+            self._state_dirty = True
+
+        if status == "ok" and not is_pbix(path):
+            self._forget_reports_without_schema(dataset_name(path))
+
+        if status != "unchanged":
+            data = json.dumps(record, indent=2).encode("utf-8")
+            write_atomic(self._result_path(path), data)
+
+        self.log(path, record)
+
+    def _forget_reports_without_schema(self, dataset):
+        """Reports of `dataset` that found no schema become new files again."""
+        for path in [
+            p for p, known in self.known.items()
+            if known["sha256"] is None and is_pbix(p) and dataset_name(p) == dataset
+        ]:
+            del self.known[path]
+            self._state_dirty = True
+
+    # ---------------------------------------------
+    # Output and state files
+    # ---------------------------------------------
+    def _result_path(self, path):
+        # Sub-folders are flattened into the file name
+        relative = os.path.relpath(path, self.folder)
+        return os.path.join(self.output_folder, relative.replace(os.sep, "__") + RESULT_SUFFIX)
+
+    def _load_state(self):
+        try:
+            with open(os.path.join(self.output_folder, STATE_FILE_NAME), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        # Files that failed without a content hash get one more try per start
+        return {path: known for path, known in state.items() if known["sha256"] is not None}
+
+    def _save_state(self):
+        if not self._state_dirty:
+            return
+        data = json.dumps(self.known, separators=(",", ":")).encode("utf-8")
+        if write_atomic(os.path.join(self.output_folder, STATE_FILE_NAME), data):
+            self._state_dirty = False
+
+
+def _log_stderr(path, record):
+    detail = record.get("error") or (f"{record['seconds']:.2f}s" if "seconds" in record else "")
+    print(f"[{time.strftime('%H:%M:%S')}] {record['status']:<9} {path} {detail}".rstrip(), file=sys.stderr)
+
+
+def watch_folder(folder, once=False, **options):
+    """Runs a FolderWatcher until Ctrl+C (or, with once=True, until the folder is processed)."""
+    watcher = FolderWatcher(folder, **options)
+    try:
+        return asyncio.run(watcher.run(once))
+    except KeyboardInterrupt:
+        return watcher.counts
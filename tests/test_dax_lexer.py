@@ -0,0 +1,66 @@
+"""
+DAX lexer: references are found outside string literals and comments,
+with quoted table names and ']]' / "''" escapes undone, and a token left
+open at the end of the expression never swallows more than the rest.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+from core.dax_lexer import dax_references, tokenize, COLUMN_REF, MEASURE_REF, TABLE_REF
+
+
+def _refs(expression):
+    return list(dax_references(expression))
+
+
+def test_string_literals_hide_brackets():
+    assert _refs('IF([Flag], "[x]", "Sales[Amount]")') == [(MEASURE_REF, None, "Flag")]
+    # A doubled quote stays inside the literal
+    assert _refs('"say ""[x]"" " & [Name]') == [(MEASURE_REF, None, "Name")]
+
+
+def test_comments_hide_references():
+    expression = "\n".join([
+        "// [Line]",
+        "[Kept] -- Sales[Dash]",
+        "/* [Block]",
+        "   'Table'[Col] */ + Sales[Amount]"
+    ])
+    assert _refs(expression) == [(MEASURE_REF, None, "Kept"), (COLUMN_REF, "Sales", "Amount")]
+
+
+def test_comment_markers_inside_strings_and_brackets():
+    assert _refs('"// not a comment" & [A -- B] & [C]') == [(MEASURE_REF, None, "A -- B"), (MEASURE_REF, None, "C")]
+
+
+def test_quoted_table_names():
+    assert _refs("SUM('It''s'[Amount])") == [(COLUMN_REF, "It's", "Amount")]
+    assert _refs("COUNTROWS('Sales Table')") == [(TABLE_REF, "Sales Table", None)]
+    # A quoted name with a bracket in it is still one table name
+    assert _refs("'A [b]'[C]") == [(COLUMN_REF, "A [b]", "C")]
+
+
+def test_bracket_escapes():
+    assert _refs("[Sales ]]Q1[]]]") == [(MEASURE_REF, None, "Sales ]Q1[]")]
+    assert _refs("Sales[Amount]][net]]]") == [(COLUMN_REF, "Sales", "Amount][net]")]
+
+
+def test_unqualified_words():
+    assert _refs("NOT [A] && TRUE") == [(MEASURE_REF, None, "A")]
+    assert _refs("CALCULATE([A], ALL(Dates))") == [(MEASURE_REF, None, "A"), (TABLE_REF, "Dates", None)]
+
+
+def test_unterminated_tokens_run_to_the_end():
+    assert _refs('[A] & "open [B]') == [(MEASURE_REF, None, "A")]
+    assert _refs("[A] /* open [B]") == [(MEASURE_REF, None, "A")]
+    assert _refs("[A] + [Open") == [(MEASURE_REF, None, "A"), (MEASURE_REF, None, "Open")]
+    assert _refs("'Open Table") == [(TABLE_REF, "Open Table", None)]
+    assert list(tokenize('"a')) == [("string", '"a')]
+    assert list(tokenize("/*")) == []
+
+
+def test_multi_line_and_missing_expressions():
+    assert _refs(["SUM(", "  Sales[Amount]", ")"]) == [(COLUMN_REF, "Sales", "Amount")]
+    assert _refs(None) == []
+    assert _refs("") == []
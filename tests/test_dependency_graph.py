@@ -0,0 +1,100 @@
+"""
+Dependency graph: strongly_connected_components() against mutual
+reachability on random graphs, the order it emits components in, and
+the cycles reported by find_cycles() / cycles_among() / cycles_through().
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import random
+
+from services.dependency_graph import DependencyGraph, strongly_connected_components
+
+
+def _random_adjacency(rng, count, edges):
+    adjacency = [[] for _ in range(count)]
+    for _ in range(edges):
+        source, target = rng.randrange(count), rng.randrange(count)
+        if target not in adjacency[source]:
+            adjacency[source].append(target)
+    return adjacency
+
+
+def _reachable(adjacency, start):
+    seen = {start}
+    stack = [start]
+    while stack:
+        for target in adjacency[stack.pop()]:
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+    return seen
+
+
+def _graph(edges):
+    graph = DependencyGraph()
+    for source, target in edges:
+        graph.add_edge(source, target)
+    return graph
+
+
+def test_components_match_mutual_reachability():
+    for seed in range(50):
+        rng = random.Random(seed)
+        count = rng.randrange(1, 30)
+        adjacency = _random_adjacency(rng, count, rng.randrange(count * 3))
+        reach = [_reachable(adjacency, node) for node in range(count)]
+
+        components = strongly_connected_components(adjacency)
+        assert sorted(n for c in components for n in c) == list(range(count)), seed
+
+        position = {}
+        for i, component in enumerate(components):
+            expected = {n for n in range(count) if component[0] in reach[n] and n in reach[component[0]]}
+            assert set(component) == expected, seed
+            position.update((node, i) for node in component)
+
+        # Every component comes after the ones it reaches
+        for source in range(count):
+            for target in adjacency[source]:
+                assert position[target] <= position[source], seed
+
+
+def test_deep_chain_does_not_recurse():
+    count = 50000
+    adjacency = [[node + 1] for node in range(count - 1)] + [[0]]
+    assert [len(c) for c in strongly_connected_components(adjacency)] == [count]
+
+
+def test_find_cycles():
+    graph = _graph([
+        ("A", "B"), ("B", "C"), ("C", "A"),     # three-node cycle
+        ("C", "D"), ("D", "E"),                 # chain out of it
+        ("F", "F"),                             # self reference
+        ("G", "H"), ("H", "G"), ("H", "A")      # second cycle feeding the first
+    ])
+    assert graph.find_cycles() == [["A", "B", "C"], ["F"], ["G", "H"]]
+    assert _graph([("A", "B"), ("B", "C"), ("A", "C")]).find_cycles() == []
+
+
+def test_cycles_among_and_through():
+    graph = _graph([("A", "B"), ("B", "C"), ("C", "A"), ("C", "D"), ("D", "C"), ("E", "E")])
+
+    # Without A the big cycle falls apart, the C / D one stays
+    assert graph.cycles_among(["B", "C", "D", "E"]) == [["C", "D"], ["E"]]
+    assert graph.cycles_through(["B"]) == [["A", "B", "C", "D"]]
+    assert graph.cycles_through(["E", "Missing"]) == [["E"]]
+
+    for seed in range(30):
+        rng = random.Random(seed)
+        count = rng.randrange(2, 15)
+        names = [f"M{n}" for n in range(count)]
+        graph = _graph((names[s], names[t]) for s, t in (
+            (rng.randrange(count), rng.randrange(count)) for _ in range(count * 2)
+        ))
+        subset = rng.sample(names, rng.randrange(count))
+
+        cycles = graph.find_cycles()
+        assert graph.cycles_through(subset) == [c for c in cycles if set(c) & set(subset)], seed
+        assert graph.cycles_among(graph.names) == cycles, seed
@@ -0,0 +1,134 @@
+"""
+Impact analysis: ImpactIndex answers (dependents through DAX chains and
+cycles, visuals, relationships) on a small hand-checked model, and its
+precomputed closures against a plain walk of the reverse graph on
+random models.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import json
+import random
+
+from core.constants import SCHEMA_FILE_NAME, LAYOUT_FILE_PATH
+from core.profiling import StageProfiler
+from services.analysis_service import analyze_members
+from services.impact_service import ImpactIndex
+
+
+def _visual(name, kind, table, prop):
+    return {"config": json.dumps({"name": name, "singleVisual": {"visualType": "card", "prototypeQuery": {
+        "From": [{"Name": "t", "Entity": table}],
+        "Select": [{kind: {"Expression": {"SourceRef": {"Source": "t"}}, "Property": prop}}]
+    }}})}
+
+
+def _analyze(tables, relationships, visuals):
+    schema = {"model": {"tables": tables, "relationships": relationships}}
+    layout = {"config": "{}", "sections": [{"displayName": "Page 1", "filters": "[]", "visualContainers": visuals}]}
+    members = {
+        SCHEMA_FILE_NAME: json.dumps(schema).encode("utf-16-le"),
+        LAYOUT_FILE_PATH: json.dumps(layout).encode("utf-16-le")
+    }
+    return analyze_members(members, StageProfiler(trace_memory=False), parallel=False)
+
+
+def _sales_model():
+    tables = [
+        {
+            "name": "Sales",
+            "columns": [{"name": "Amount"}, {"name": "Key"}, {"name": "Double", "expression": "[Amount] * 2"}],
+            "measures": [
+                {"name": "Total", "expression": "SUM(Sales[Amount])"},
+                {"name": "Twice", "expression": "[Total] * 2"},
+                {"name": "Ping", "expression": "[Twice] + [Pong]"},
+                {"name": "Pong", "expression": "[Ping]"}
+            ]
+        },
+        {"name": "Dates", "columns": [{"name": "Key"}], "measures": []}
+    ]
+    relationships = [{"fromTable": "Sales", "fromColumn": "Double", "toTable": "Dates", "toColumn": "Key"}]
+    visuals = [_visual("v1", "Measure", "Sales", "Twice"), _visual("v2", "Column", "Dates", "Key")]
+    return _analyze(tables, relationships, visuals)
+
+
+def test_impact_of_a_source_column():
+    index = ImpactIndex(_sales_model())
+
+    assert index.impact("Sales[Amount]") == {
+        "field": "Sales[Amount]",
+        "direct_dependents": ["Sales[Double]", "Sales[Total]"],
+        "measures": ["Sales[Ping]", "Sales[Pong]", "Sales[Total]", "Sales[Twice]"],
+        "calculated_columns": ["Sales[Double]"],
+        "visuals": [("Page 1", "card v1")],
+        # Through the calculated column built on it
+        "relationships": [("Sales[Double]", "Dates[Key]")]
+    }
+
+
+def test_impact_inside_a_cycle():
+    index = ImpactIndex(_sales_model())
+
+    # Each member of the cycle depends on the other, never on itself
+    assert index.impact("Sales[Ping]")["measures"] == ["Sales[Pong]"]
+    assert index.impact("Sales[Pong]")["direct_dependents"] == ["Sales[Ping]"]
+    assert index.impact("Sales[Twice]")["measures"] == ["Sales[Ping]", "Sales[Pong]"]
+
+
+def test_unused_and_unknown_fields():
+    index = ImpactIndex(_sales_model())
+
+    assert index.impact("Sales[Key]") == {
+        "field": "Sales[Key]", "direct_dependents": [], "measures": [], "calculated_columns": [],
+        "visuals": [], "relationships": []
+    }
+    assert index.impact("Dates[Key]")["visuals"] == [("Page 1", "card v2")]
+    assert "Sales[Missing]" not in index
+    assert index.impact("Sales[Missing]") is None
+
+
+def test_closures_match_a_plain_walk():
+    for seed in range(20):
+        rng = random.Random(seed)
+        count = rng.randrange(2, 25)
+        measures = [f"M{k}" for k in range(count)]
+        tables = [{
+            "name": "T",
+            "columns": [{"name": "C"}],
+            "measures": [{
+                "name": name,
+                "expression": " + ".join(f"[{m}]" for m in rng.sample(measures, rng.randrange(3))) or "SUM(T[C])"
+            } for name in measures]
+        }]
+        visuals = [_visual(f"v{i}", "Measure", "T", rng.choice(measures)) for i in range(3)]
+        result = _analyze(tables, [], visuals)
+        index = ImpactIndex(result)
+
+        names = result.fields.names
+        dependents = {name: set() for name in names}
+        for source, target in result.dependency_edges:
+            dependents[names[target]].add(names[source])
+
+        used_by_visual = {}
+        for visual, bits in zip(result.visuals, result.visual_bits):
+            for field in result.fields.fields(bits):
+                used_by_visual.setdefault(field, set()).add(visual)
+
+        for field in names:
+            seen = set()
+            stack = [field]
+            while stack:
+                for source in dependents[stack.pop()]:
+                    if source not in seen:
+                        seen.add(source)
+                        stack.append(source)
+
+            impact = index.impact(field)
+            assert set(impact["measures"]) | set(impact["calculated_columns"]) == seen - {field}, (seed, field)
+            assert sorted(impact["direct_dependents"]) == sorted(dependents[field] - {field}), (seed, field)
+
+            visuals = set()
+            for name in seen | {field}:
+                visuals |= used_by_visual.get(name, set())
+            assert set(impact["visuals"]) == visuals, (seed, field)
@@ -0,0 +1,96 @@
+"""
+Streaming Layout parser: every chunk size must give the same objects
+as parsing the whole document, whatever a chunk boundary cuts (a
+string, an escape, a surrogate pair or a single UTF-16 code unit).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import json
+
+from core.layout_stream import iter_layout_objects, REPORT, SECTION, VISUAL
+from services.layout_service import scan_layout, scan_layout_stream
+
+
+def _visual(name, table, column):
+    config = {
+        "name": name,
+        "singleVisual": {
+            "visualType": "card",
+            "prototypeQuery": {
+                "From": [{"Name": "t", "Entity": table}],
+                "Select": [{"Column": {"Expression": {"SourceRef": {"Source": "t"}}, "Property": column}}]
+            }
+        }
+    }
+    return {"x": 0, "config": json.dumps(config), "filters": "[]"}
+
+
+def _layout():
+    return {
+        "config": "{}",
+        "filters": "[]",
+        "sections": [
+            {
+                # Surrogate pair (U+1F4CA) and escaped quotes / backslashes
+                "displayName": "Sales \U0001F4CA \"Q1\" \\ [draft]",
+                "filters": "[]",
+                "visualContainers": [
+                    _visual("v1", "Sales", "Amount \U0001F4B0"),
+                    _visual("v2", "Sales", "Qty } ]"),
+                ]
+            },
+            {
+                "displayName": "Ünïcödé",
+                "visualContainers": [_visual("v3", "Customer", "Name")]
+            }
+        ]
+    }
+
+
+def _expected(layout):
+    """(kind, object) in the order iter_layout_objects() yields them."""
+    objects = []
+    for section in layout["sections"]:
+        objects += [(VISUAL, visual) for visual in section["visualContainers"]]
+        objects.append((SECTION, dict(section, visualContainers=[])))
+    objects.append((REPORT, dict(layout, sections=[])))
+    return objects
+
+
+def test_every_chunk_boundary_utf16():
+    layout = _layout()
+    raw = json.dumps(layout, ensure_ascii=False).encode("utf-16-le")
+    expected = _expected(layout)
+
+    # Odd sizes split UTF-16 code units, 2 and 6 split surrogate pairs
+    for chunk_bytes in list(range(1, 40)) + [len(raw) // 3, len(raw)]:
+        assert list(iter_layout_objects(raw, chunk_bytes)) == expected, chunk_bytes
+
+
+def test_every_chunk_boundary_utf8():
+    layout = _layout()
+    raw = json.dumps(layout, ensure_ascii=False).encode("utf-8")
+    expected = _expected(layout)
+
+    for chunk_bytes in range(1, 40):
+        assert list(iter_layout_objects(raw, chunk_bytes)) == expected, chunk_bytes
+
+
+def test_stream_scan_matches_tree_scan():
+    layout = _layout()
+    raw = json.dumps(layout, ensure_ascii=False).encode("utf-16-le")
+
+    tree_usage = []
+    tree_fingerprints = []
+    used = scan_layout(layout, parallel=False, visual_usage=tree_usage, fingerprints=tree_fingerprints)
+
+    stream_usage = []
+    stream_fingerprints = []
+    stream_used, visuals = scan_layout_stream(raw, visual_usage=stream_usage, fingerprints=stream_fingerprints)
+
+    assert stream_used == used == {"Sales[Amount \U0001F4B0]", "Sales[Qty } ]]", "Customer[Name]"}
+    assert visuals == 3
+    assert stream_usage == tree_usage
+    assert sorted(stream_fingerprints) == sorted(tree_fingerprints)
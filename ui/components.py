@@ -0,0 +1,193 @@
+import math
+import os
+import time
+
+import streamlit as st
+
+from config.settings import ANALYSIS_WORKERS, FIELD_LIST_PAGE_SIZE
+from config.settings import LINEAGE_MAX_HOPS, LINEAGE_DEFAULT_HOPS, LINEAGE_MAX_NODES
+from core.process_pool import RetryingPool
+from models.symbol_table import split_field
+from services.impact_service import ImpactIndex
+from services.lineage_service import LineageGraph, UPSTREAM, DOWNSTREAM, to_dot
+
+
+# =========================
+# BACKGROUND ANALYSIS POOL
+# =========================
+
+@st.cache_resource
+def get_analysis_pool():
+    """
+    One process pool per server, shared by every browser session.
+    Concurrent uploads run side by side (up to ANALYSIS_WORKERS) and
+    queue beyond that, instead of blocking each session's script thread.
+    """
+    return RetryingPool(ANALYSIS_WORKERS)
+
+
+def nested_workers():
+    """
+    Size of a process pool opened inside a run of the shared pool: the
+    CPUs are split between the ANALYSIS_WORKERS runs instead of each
+    run starting one process per CPU.
+    """
+    return max(1, (os.cpu_count() or 1) // ANALYSIS_WORKERS)
+
+
+def run_in_background(fn, *args, label="Analyzing template..."):
+    """Runs fn(*args) in the shared pool, showing its progress until it returns."""
+    future = get_analysis_pool().submit(fn, *args)
+    start = time.perf_counter()
+
+    with st.status(label, expanded=False) as status:
+        while not future.done():
+            elapsed = time.perf_counter() - start
+            state = "Analyzing" if future.running() else "Queued, waiting for a free worker"
+            status.update(label=f"{state}... {elapsed:.0f}s")
+            time.sleep(0.2)
+
+        if future.exception() is None:
+            status.update(label=f"Analysis finished in {time.perf_counter() - start:.1f}s", state="complete")
+        else:
+            status.update(label="Analysis failed", state="error")
+
+    return future.result()
+
+
+# =========================
+# PAGINATED FIELD LIST
+# =========================
+
+def show_field_list(title, fields, key):
+    """
+    Renders one category as a dataframe. Long lists get a search box
+    and are sent one page at a time, so big models stay responsive.
+    """
+    st.write(f"### {title} ({len(fields)})")
+
+    rows = sorted(fields)
+
+    if len(rows) > FIELD_LIST_PAGE_SIZE:
+        query = st.text_input("Search", key=f"{key}_search", placeholder="Filter by table or field name")
+        if query:
+            rows = [f for f in rows if query.lower() in f.lower()]
+
+        pages = max(1, math.ceil(len(rows) / FIELD_LIST_PAGE_SIZE))
+        # Keyed by the search text, so a new search starts at page 1
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=f"{key}_page_{query}") if pages > 1 else 1
+        rows = rows[(page - 1) * FIELD_LIST_PAGE_SIZE:page * FIELD_LIST_PAGE_SIZE]
+
+    if not rows:
+        st.caption("None")
+        return
+
+    tables, names = zip(*(split_field(f) for f in rows))
+    st.dataframe({"Table": tables, "Field": names}, hide_index=True, width="stretch")
+
+
+# =========================
+# IMPACT ANALYSIS
+# =========================
+
+def get_impact_index(memo, result):
+    """Built on first use and kept in the session memo, so every query is a lookup."""
+    if memo.get("impact") is None:
+        memo["impact"] = ImpactIndex(result)
+    return memo["impact"]
+
+
+def show_impact(result, memo):
+    field = st.selectbox(
+        "Impact of removing",
+        sorted(result.columns | result.measures),
+        index=None,
+        placeholder="Search a column or measure"
+    )
+    if not field:
+        return
+
+    impact = get_impact_index(memo, result).impact(field)
+    if impact is None:
+        return
+
+    if not (impact["measures"] or impact["calculated_columns"] or impact["visuals"] or impact["relationships"]):
+        st.success(f"Nothing depends on {field}: it can be removed safely.")
+        return
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Dependent Measures", len(impact["measures"]))
+    c2.metric("Dependent Calculated Columns", len(impact["calculated_columns"]))
+    c3.metric("Visuals / Filters", len(impact["visuals"]))
+    c4.metric("Relationships", len(impact["relationships"]))
+
+    if impact["direct_dependents"]:
+        st.caption("Referenced directly by: " + ", ".join(impact["direct_dependents"]))
+
+    show_field_list("Dependent Measures", impact["measures"], "impact_measures")
+    show_field_list("Dependent Calculated Columns", impact["calculated_columns"], "impact_columns")
+
+    if impact["visuals"]:
+        pages, visuals = zip(*impact["visuals"])
+        st.write(f"### Visuals and Filters ({len(impact['visuals'])})")
+        st.dataframe({"Page": pages, "Visual": visuals}, hide_index=True, width="stretch")
+
+    if impact["relationships"]:
+        from_columns, to_columns = zip(*impact["relationships"])
+        st.write(f"### Relationships ({len(impact['relationships'])})")
+        st.dataframe({"From": from_columns, "To": to_columns}, hide_index=True, width="stretch")
+
+
+# =========================
+# LINEAGE EXPLORER
+# =========================
+
+def get_lineage_graph(memo, result):
+    """Built on first use and kept in the session memo, with its per-field cache."""
+    if memo.get("lineage") is None:
+        memo["lineage"] = LineageGraph(result)
+    return memo["lineage"]
+
+
+def show_lineage(result, memo):
+    """
+    Draws the neighborhood of one field only: the graph stays on the
+    server and the browser gets at most LINEAGE_MAX_NODES nodes.
+    """
+    field = st.selectbox(
+        "Lineage of",
+        sorted(result.columns | result.measures),
+        index=None,
+        placeholder="Search a column or measure"
+    )
+    if not field:
+        return
+
+    col1, col2 = st.columns(2)
+    direction = col1.radio(
+        "Direction",
+        [DOWNSTREAM, UPSTREAM],
+        format_func=lambda d: "Downstream (what uses it)" if d == DOWNSTREAM else "Upstream (what it uses)",
+        horizontal=True
+    )
+    hops = col2.slider("Hops", min_value=1, max_value=LINEAGE_MAX_HOPS, value=LINEAGE_DEFAULT_HOPS)
+
+    start = time.perf_counter()
+    lineage = get_lineage_graph(memo, result).neighborhood(field, direction, hops)
+    if lineage is None:
+        return
+    dot = to_dot(lineage)
+    elapsed = time.perf_counter() - start
+
+    if len(lineage.nodes) == 1:
+        st.info(f"{field} has no {direction} lineage.")
+        return
+
+    st.caption(f"{len(lineage.nodes)} nodes · {len(lineage.edges)} edges · built in {elapsed * 1000:.1f} ms")
+    if lineage.omitted:
+        st.warning(
+            f"Capped at {LINEAGE_MAX_NODES} nodes: {lineage.omitted} more are not drawn. "
+            "Lower the hops to see a complete neighborhood."
+        )
+
+    st.graphviz_chart(dot, width="stretch")
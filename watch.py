@@ -0,0 +1,60 @@
+"""
+Watches a folder and analyzes every new or modified Power BI template
+or report dropped into it.
+
+Usage:
+    python watch.py INBOX_DIR [--output results/] [--workers 4] [--index]
+    python watch.py INBOX_DIR --once     (process what is there, then exit)
+
+Files are picked up once their size and modification time have been
+stable for --debounce seconds, and analyzed again only when their
+content hash changes. One JSON result per file is written to --output
+(same record as cli.py) together with the watch state, so a restart
+does not re-analyze anything. Ctrl+C stops watching.
+"""
+
+import argparse
+import sys
+
+from config.settings import (
+    WATCH_OUTPUT_FOLDER, WATCH_POLL_SECONDS, WATCH_DEBOUNCE_SECONDS, WATCH_WORKERS, WATCH_MAX_QUEUED
+)
+from services.watch_service import watch_folder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze .pbit / .pbix files dropped into a folder.")
+    parser.add_argument("folder", help="folder to watch (sub-folders included)")
+    parser.add_argument("--output", default=WATCH_OUTPUT_FOLDER, help="folder for the JSON results")
+    parser.add_argument("--workers", type=int, default=WATCH_WORKERS, help="worker processes (default: one per CPU)")
+    parser.add_argument("--poll", type=float, default=WATCH_POLL_SECONDS, help="seconds between folder scans")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE_SECONDS,
+                        help="seconds a file must stay unchanged before it is analyzed")
+    parser.add_argument("--max-queued", type=int, default=WATCH_MAX_QUEUED,
+                        help="files waiting for a worker before scanning pauses")
+    parser.add_argument("--schema", help="model for .pbix files: a .pbit or a DataModelSchema / model.bim JSON")
+    parser.add_argument("--index", action="store_true", help="store every analysis in the usage index")
+    parser.add_argument("--once", action="store_true", help="exit once the folder has been processed")
+    args = parser.parse_args(argv)
+
+    counts = watch_folder(
+        args.folder,
+        once=args.once,
+        output_folder=args.output,
+        workers=args.workers,
+        poll_seconds=args.poll,
+        debounce_seconds=args.debounce,
+        max_queued=args.max_queued,
+        schema_path=args.schema,
+        index=args.index
+    )
+
+    print(
+        f"{counts['ok']} analyzed, {counts['error']} failed, {counts['unchanged']} unchanged",
+        file=sys.stderr
+    )
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())